@@ -1,7 +1,11 @@
+import logging
 import os
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -18,6 +22,57 @@ engine = create_engine(DATABASE_URL, echo=False,
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+# --- Optional async stack for read-heavy endpoints ---
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+# asyncpg takes its own connect() keywords, not libpq's; only sslmode has an equivalent
+ASYNCPG_QUERY = {"sslmode": "ssl"}
+
+def _default_async_url(url: str):
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if not driver:
+        return None
+    if driver == ASYNC_DRIVERS["postgresql"] and parsed.query:
+        dropped = sorted(set(parsed.query) - set(ASYNCPG_QUERY))
+        if dropped:
+            logger.warning(
+                "Async engine ignores DATABASE_URL parameters %s; set ASYNC_DATABASE_URL to configure them.",
+                ", ".join(dropped)
+            )
+        parsed = parsed.set(query={
+            ASYNCPG_QUERY[key]: value for key, value in parsed.query.items() if key in ASYNCPG_QUERY
+        })
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _default_async_url(DATABASE_URL)
+# A separate pool on top of the sync engine's 10 + 20 connections per worker
+ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", 5))
+ASYNC_DB_MAX_OVERFLOW = int(os.getenv("ASYNC_DB_MAX_OVERFLOW", 5))
+
+_async_engine = None
+_AsyncSessionLocal = None
+
+def get_async_engine():
+    """Created on first use, so deployments without an async driver are unaffected."""
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+        if not ASYNC_DATABASE_URL:
+            raise ValueError("ASYNC_DATABASE_URL is not set and cannot be derived from DATABASE_URL")
+        _async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False,
+                                            pool_pre_ping=True,
+                                            pool_recycle=1800,
+                                            pool_size=ASYNC_DB_POOL_SIZE,
+                                            max_overflow=ASYNC_DB_MAX_OVERFLOW)
+        _AsyncSessionLocal = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
 class Base(DeclarativeBase):
     pass
 
@@ -26,4 +81,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
\ No newline at end of file
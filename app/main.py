@@ -1,12 +1,24 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
-from fastapi.responses import RedirectResponse
-from app.database import Base, engine, get_db
-from app.routers import suppliers, spend, emission_factors, auth
+from fastapi.responses import RedirectResponse, Response
+from app.database import Base, engine, get_db, SessionLocal
+from app.routers import suppliers, spend, emission_factors, auth, disclosures
+from app.services.factor_store import warm_factor_store
+from app.services.google_oauth import close_http_client
+from app.services.metrics import MetricsMiddleware, render_metrics
 from sqlalchemy import text
 from fastapi.middleware.cors import CORSMiddleware
 
 
-app = FastAPI(title="Procurement Carbon Engine")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Every worker maps the same on-disk factor arrays; the first one on a host builds them
+    warm_factor_store(SessionLocal)
+    yield
+    await close_http_client()
+
+
+app = FastAPI(title="Procurement Carbon Engine", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,10 +31,13 @@ app.add_middleware(
     allow_headers=["*"], 
 )
 
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(suppliers.router)
 app.include_router(spend.router)
 app.include_router(emission_factors.router)
 app.include_router(auth.router)
+app.include_router(disclosures.router)
 
 @app.get("/")
 def root():
@@ -32,3 +47,9 @@ def root():
 def db_health_check(db = Depends(get_db)):
     db.execute(text("SELECT 1"))
     return {"status": "ok_fine"}
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+def metrics():
+    # Prometheus text exposition format
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
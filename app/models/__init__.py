@@ -1,6 +1,8 @@
 from .supplier import Supplier
 from .supplier_disclosure import SupplierDisclosure
+from .supplier_closure import SupplierClosure
 from .emission_factors import EmissionFactor
+from .factor_version import FactorVersion
 from .spend import SpendRecord
 from .emission_estimate import EmissionEstimate
 from .category import Category
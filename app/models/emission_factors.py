@@ -1,14 +1,23 @@
 import uuid
 from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import String, Numeric, Integer, DateTime, ForeignKey
+from sqlalchemy import String, Numeric, Integer, DateTime, ForeignKey, Index, DDL, event, func
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, mapped_column, validates
 from app.database import Base
+from app.services.geography import normalize_geography
+
+
+def _default_geo_key(context):
+    # Covers core inserts (e.g. the bulk seeder) that bypass the ORM validator
+    return normalize_geography(context.get_current_parameters().get("geography"))
 
 
 class EmissionFactor(Base):
     __tablename__ = "emission_factors"
+    __table_args__ = (
+        Index("ix_emission_factors_provider_ext_geo", "provider", "external_id", "geo_key"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -19,6 +28,7 @@ class EmissionFactor(Base):
 
     name: Mapped[str] = mapped_column(String, nullable=False)
     geography: Mapped[str] = mapped_column(String, nullable=False)
+    geo_key: Mapped[str] = mapped_column(String, nullable=True, default=_default_geo_key)
     year: Mapped[int] = mapped_column(Integer, nullable=False)
 
 
@@ -44,4 +54,30 @@ class EmissionFactor(Base):
 
     owner_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
-    )
\ No newline at end of file
+    )
+
+    @validates("geography")
+    def _sync_geo_key(self, key, value):
+        self.geo_key = normalize_geography(value)
+        return value
+
+
+# Search indexes: trigram GIN on Postgres, lowercase prefix (range-scannable) on SQLite
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+Index(
+    "ix_emission_factors_name_trgm", EmissionFactor.name,
+    postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}
+).ddl_if(dialect="postgresql")
+
+Index(
+    "ix_emission_factors_external_id_trgm", EmissionFactor.external_id,
+    postgresql_using="gin", postgresql_ops={"external_id": "gin_trgm_ops"}
+).ddl_if(dialect="postgresql")
+
+Index("ix_emission_factors_name_prefix", func.lower(EmissionFactor.name)).ddl_if(dialect="sqlite")
+Index("ix_emission_factors_external_id_prefix", func.lower(EmissionFactor.external_id)).ddl_if(dialect="sqlite")
\ No newline at end of file
@@ -0,0 +1,18 @@
+from datetime import datetime
+from sqlalchemy import String, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class FactorVersion(Base):
+    """
+    Version stamps for cached factor data, shared by every worker on every host.
+
+    "factors" changes whenever any factor is created or re-seeded; "ceda"
+    only when the Open CEDA catalogue behind the factor store changes.
+    """
+    __tablename__ = "factor_versions"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    version: Mapped[str] = mapped_column(String, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
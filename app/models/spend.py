@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, Numeric, DateTime, String, Integer
+from sqlalchemy import ForeignKey, Numeric, DateTime, String, Integer, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 from decimal import Decimal
@@ -9,6 +9,21 @@ import uuid
 
 class SpendRecord(Base):
     __tablename__ = "spend_records"
+    __table_args__ = (
+        Index("ix_spend_records_owner_supplier", "owner_id", "supplier_id"),
+        # Partial indexes keep the Resolution Center queries small as tables grow
+        Index(
+            "ix_spend_records_requires_mapping", "owner_id", "category_code",
+            postgresql_where=text("calculation_method = 'Requires_Mapping'"),
+            sqlite_where=text("calculation_method = 'Requires_Mapping'")
+        ),
+        # Matches calculate_emissions' scan of uncalculated records (all owners)
+        Index(
+            "ix_spend_records_uncalculated", "spend_id",
+            postgresql_where=text("calculated_co2e IS NULL"),
+            sqlite_where=text("calculated_co2e IS NULL")
+        ),
+    )
 
     spend_id: Mapped[int] = mapped_column(Integer, primary_key=True)
 
@@ -49,7 +49,8 @@ class Supplier(Base):
     parent_id = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("suppliers.id", ondelete="SET NULL"),
-        nullable=True
+        nullable=True,
+        index=True
     )
 
     parent = relationship(
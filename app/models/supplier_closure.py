@@ -0,0 +1,102 @@
+import uuid
+from sqlalchemy import Integer, ForeignKey, Index, delete, event, insert, inspect, select
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+from app.models.supplier import Supplier
+
+
+class SupplierClosure(Base):
+    """One row per (ancestor, descendant) pair of the supplier forest, including (id, id, 0)."""
+    __tablename__ = "supplier_closure"
+    __table_args__ = (
+        Index("ix_supplier_closure_descendant_depth", "descendant_id", "depth"),
+    )
+
+    ancestor_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("suppliers.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+
+    descendant_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("suppliers.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+# --- Maintenance: runs inside the flush, so the closure commits with the supplier ---
+_closure = SupplierClosure.__table__
+_suppliers = Supplier.__table__
+
+
+def _attach(connection, child_id, parent_id):
+    """Link the subtree under child_id to parent_id and all of its ancestors."""
+    above = _closure.alias("above")
+    below = _closure.alias("below")
+    connection.execute(
+        insert(_closure).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(above.c.ancestor_id, below.c.descendant_id, above.c.depth + below.c.depth + 1).where(
+                above.c.descendant_id == parent_id,
+                below.c.ancestor_id == child_id
+            )
+        )
+    )
+
+
+def _detach(connection, node_id):
+    """Unlink the subtree under node_id from everything above it."""
+    subtree = select(_closure.c.descendant_id).where(_closure.c.ancestor_id == node_id).scalar_subquery()
+    connection.execute(
+        delete(_closure).where(
+            _closure.c.descendant_id.in_(subtree),
+            _closure.c.ancestor_id.not_in(subtree)
+        )
+    )
+
+
+@event.listens_for(Supplier, "after_insert")
+def _closure_after_insert(mapper, connection, target):
+    connection.execute(insert(_closure).values(ancestor_id=target.id, descendant_id=target.id, depth=0))
+    if target.parent_id:
+        _attach(connection, target.id, target.parent_id)
+
+    # Children flushed before their parent in the same unit of work are linked now
+    above = _closure.alias("above")
+    below = _closure.alias("below")
+    connection.execute(
+        insert(_closure).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(above.c.ancestor_id, below.c.descendant_id, above.c.depth + below.c.depth + 1).where(
+                above.c.descendant_id == target.id,
+                _suppliers.c.parent_id == target.id,
+                below.c.ancestor_id == _suppliers.c.id
+            )
+        )
+    )
+
+
+@event.listens_for(Supplier, "after_update")
+def _closure_after_update(mapper, connection, target):
+    if not inspect(target).attrs.parent_id.history.has_changes():
+        return
+    _detach(connection, target.id)
+    if target.parent_id:
+        _attach(connection, target.id, target.parent_id)
+
+
+@event.listens_for(Supplier, "before_delete")
+def _closure_before_delete(mapper, connection, target):
+    # Drop every pair that passes through the supplier; its children become roots
+    subtree = select(_closure.c.descendant_id).where(_closure.c.ancestor_id == target.id).scalar_subquery()
+    ancestors = select(_closure.c.ancestor_id).where(_closure.c.descendant_id == target.id).scalar_subquery()
+    connection.execute(
+        delete(_closure).where(
+            _closure.c.descendant_id.in_(subtree),
+            _closure.c.ancestor_id.in_(ancestors)
+        )
+    )
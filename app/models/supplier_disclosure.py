@@ -18,9 +18,15 @@ class SupplierDisclosure(Base):
     supplier_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("suppliers.id", ondelete="CASCADE"),
-        nullable=False
+        nullable=True
     )
 
+    # --- Registry identity (see app.services.disclosure_registry) ---
+    company_name: Mapped[str] = mapped_column(String, nullable=True)
+    domain: Mapped[str] = mapped_column(String, nullable=True)
+    domain_key: Mapped[str] = mapped_column(String, nullable=True, index=True)
+    name_key: Mapped[str] = mapped_column(String, nullable=True, index=True)
+
     reporting_year: Mapped[int] = mapped_column(Integer, nullable=False)
 
     revenue_usd: Mapped[float] = mapped_column(Numeric, nullable=False)
@@ -35,6 +41,18 @@ class SupplierDisclosure(Base):
 
     source_url: Mapped[str] = mapped_column(String, nullable=True)
 
+    # --- Precomputed revenue intensities (tCO2e per USD) ---
+    co2e_intensity: Mapped[float] = mapped_column(Numeric, nullable=True)
+    scope_1_intensity: Mapped[float] = mapped_column(Numeric, nullable=True)
+    scope_2_intensity: Mapped[float] = mapped_column(Numeric, nullable=True)
+    scope_3_intensity: Mapped[float] = mapped_column(Numeric, nullable=True)
+
+    emission_factor_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("emission_factors.id"),
+        nullable=True
+    )
+
     ingested_at: Mapped[datetime] = mapped_column(
         DateTime,
         default=datetime.utcnow
@@ -1,41 +1,76 @@
-import os
-import requests
 from pydantic import BaseModel
 from fastapi import APIRouter, Depends, HTTPException, status
+from starlette.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm, HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt, JWTError
 
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.user import User
 from app.schemas.auth import UserCreate, UserLogin, Token, UserRead
-from app.services.security import verify_password, get_password_hash, create_access_token, SECRET_KEY, ALGORITHM
+from app.services.security import (
+    verify_password_async, get_password_hash_async, create_access_token, PasswordHasherBusy, SECRET_KEY, ALGORITHM
+)
+from app.services.auth_cache import UserSnapshot, token_user_cache
+from app.services.google_oauth import (
+    GOOGLE_CLIENT_ID, GOOGLE_REDIRECT_URI, GoogleOAuthUnavailable, exchange_code, fetch_userinfo
+)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 security = HTTPBearer()
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    token = credentials.credentials 
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
 
+def _decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
     except JWTError:
         raise credentials_exception
-        
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
+    if payload.get("sub") is None:
         raise credentials_exception
-    return user
+    return payload
+
+def _cache_user(token: str, payload: dict, user: User | None) -> UserSnapshot:
+    # Deactivated accounts are refused, so clearing is_active revokes their live tokens
+    if user is None or not user.is_active:
+        raise credentials_exception
+    snapshot = UserSnapshot.from_user(user)
+    token_user_cache.put(token, snapshot, payload.get("exp"))
+    return snapshot
+
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+    token = credentials.credentials 
+
+    # Steady-state traffic is served from the token cache without touching users
+    cached = token_user_cache.get(token)
+    if cached is not None:
+        return cached
+
+    payload = _decode_token(token)
+    user = db.query(User).filter(User.email == payload["sub"]).first()
+    return _cache_user(token, payload, user)
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """get_current_user for async endpoints: a cache miss uses the request's async session, not a sync connection."""
+    token = credentials.credentials
+
+    cached = token_user_cache.get(token)
+    if cached is not None:
+        return cached
+
+    payload = _decode_token(token)
+    user = (await db.execute(select(User).where(User.email == payload["sub"]))).scalars().first()
+    return _cache_user(token, payload, user)
 
 def get_admin_user(current_user: User = Depends(get_current_user)):
     """Dependency that ensures the current user is an admin."""
@@ -47,34 +82,63 @@ def get_admin_user(current_user: User = Depends(get_current_user)):
     return current_user
 
 
+@router.get("/cache-stats")
+def auth_cache_stats(admin_user: User = Depends(get_admin_user)):
+    """Hit rate of the token -> user cache used by get_current_user."""
+    return token_user_cache.stats()
+
+
 # --- Local Auth ---
+# signup/login are async: bcrypt goes to the bounded password hasher pool and
+# the (blocking) database calls to the threadpool, so neither ties up the other.
+
+hasher_busy_exception = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Authentication is busy, please retry shortly.",
+    headers={"Retry-After": "1"},
+)
+
+def _find_user(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+def _save_user(db: Session, user: User):
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
 
 @router.post("/signup", response_model=UserRead)
-def signup(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
+async def signup(user: UserCreate, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(_find_user, db, user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_pw = get_password_hash(user.password)
+    try:
+        hashed_pw = await get_password_hash_async(user.password)
+    except PasswordHasherBusy:
+        raise hasher_busy_exception
+
     new_user = User(
         email=user.email,
         hashed_password=hashed_pw,
         full_name=user.full_name,
         provider="local"
     )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
+    return await run_in_threadpool(_save_user, db, new_user)
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form_data.username).first()
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_find_user, db, form_data.username)
     
     if not user or not user.hashed_password:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     
-    if not verify_password(form_data.password, user.hashed_password):
+    try:
+        password_ok = await verify_password_async(form_data.password, user.hashed_password)
+    except PasswordHasherBusy:
+        raise hasher_busy_exception
+
+    if not password_ok:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     
     access_token = create_access_token(data={"sub": user.email})
@@ -85,46 +149,47 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
 def get_current_user_profile(current_user: User = Depends(get_current_user)):
     return current_user
 # --- Google Auth ---
+# Outbound calls use the shared async client in app.services.google_oauth.
 
-GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
-GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
-GOOGLE_REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI", "http://localhost:8000/auth/google/callback")
+google_unavailable_exception = HTTPException(
+    status_code=status.HTTP_502_BAD_GATEWAY,
+    detail="Google did not respond, please retry shortly."
+)
 
 
 class GoogleToken(BaseModel):
     token: str
 
+def _get_or_create_google_user(db: Session, user_info: dict):
+    user = _find_user(db, user_info["email"])
+    if not user:
+        user = _save_user(db, User(
+            email=user_info["email"],
+            full_name=user_info.get("name"),
+            picture=user_info.get("picture"),
+            provider="google",
+            is_active=True
+        ))
+    return user
+
 @router.post("/google/", response_model=Token)
-def google_login_direct(payload: GoogleToken, db: Session = Depends(get_db)):
+async def google_login_direct(payload: GoogleToken, db: Session = Depends(get_db)):
     # 1. Ask Google for the user's info using the token React sent us
-    user_info_res = requests.get(f"https://www.googleapis.com/oauth2/v1/userinfo?alt=json&access_token={payload.token}")
+    try:
+        user_info = await fetch_userinfo(payload.token)
+    except GoogleOAuthUnavailable:
+        raise google_unavailable_exception
     
-    if user_info_res.status_code != 200:
+    if user_info is None:
         raise HTTPException(status_code=400, detail="Failed to retrieve user info from Google")
     
-    user_info = user_info_res.json()
-    email = user_info.get("email")
-    
-    if not email:
+    if not user_info.get("email"):
         raise HTTPException(status_code=400, detail="No email provided by Google")
     
-    # 2. Check if the user already exists in our database
-    user = db.query(User).filter(User.email == email).first()
+    # 2. Find the user, or create an account for them automatically
+    user = await run_in_threadpool(_get_or_create_google_user, db, user_info)
     
-    # 3. If they don't exist, create an account for them automatically
-    if not user:
-        user = User(
-            email=email,
-            full_name=user_info.get("name"),
-            picture=user_info.get("picture"),
-            provider="google",
-            is_active=True
-        )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-    
-    # 4. Generate our own backend JWT token and send it back to React
+    # 3. Generate our own backend JWT token and send it back to React
     access_token = create_access_token(data={"sub": user.email})
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -135,41 +200,22 @@ def google_login_url():
     }
 
 @router.get("/google/callback", response_model=Token)
-def google_auth_callback(code: str, db: Session = Depends(get_db)):
+async def google_auth_callback(code: str, db: Session = Depends(get_db)):
     # Exchange code for tokens
-    token_url = "https://oauth2.googleapis.com/token"
-    payload = {
-        "client_id": GOOGLE_CLIENT_ID,
-        "client_secret": GOOGLE_CLIENT_SECRET,
-        "code": code,
-        "grant_type": "authorization_code",
-        "redirect_uri": GOOGLE_REDIRECT_URI,
-    }
-    res = requests.post(token_url, data=payload)
-    if res.status_code != 200:
-        raise HTTPException(status_code=400, detail="Failed to retrieve token from Google")
-    
-    tokens = res.json()
-    
-    user_info_res = requests.get(f"https://www.googleapis.com/oauth2/v1/userinfo?alt=json&access_token={tokens['access_token']}")
-    user_info = user_info_res.json()
-    
-    email = user_info.get("email")
+    try:
+        tokens = await exchange_code(code)
+        if tokens is None:
+            raise HTTPException(status_code=400, detail="Failed to retrieve token from Google")
+
+        user_info = await fetch_userinfo(tokens["access_token"])
+    except GoogleOAuthUnavailable:
+        raise google_unavailable_exception
+
+    if not user_info or not user_info.get("email"):
+        raise HTTPException(status_code=400, detail="Failed to retrieve user info from Google")
     
     # Check if user exists, else create
-    user = db.query(User).filter(User.email == email).first()
-    
-    if not user:
-        user = User(
-            email=email,
-            full_name=user_info.get("name"),
-            picture=user_info.get("picture"),
-            provider="google",
-            is_active=True
-        )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+    user = await run_in_threadpool(_get_or_create_google_user, db, user_info)
     
     access_token = create_access_token(data={"sub": user.email})
     return {"access_token": access_token, "token_type": "bearer"}
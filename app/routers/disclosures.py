@@ -0,0 +1,36 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.schemas.disclosure import SupplierDisclosureRead
+from app.routers.auth import get_admin_user, get_current_user, User
+from app.services.disclosure_registry import find_disclosure, import_disclosures, read_disclosure_file
+
+router = APIRouter(prefix="/disclosures", tags=["Disclosures"])
+
+@router.post("/import")
+async def import_disclosure_file(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(get_admin_user)
+):
+    content = await file.read()
+    try:
+        rows = read_disclosure_file(file.filename, content)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Registry entries are shared by every tenant; the importing admin is recorded as owner
+    return import_disclosures(db, rows, admin_user.id)
+
+@router.get("/lookup", response_model=SupplierDisclosureRead)
+def lookup_disclosure(
+    domain: Optional[str] = None,
+    name: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    disclosure = find_disclosure(db, domain, name)
+    if not disclosure:
+        raise HTTPException(status_code=404, detail="No disclosure found")
+    return disclosure
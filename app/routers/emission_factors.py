@@ -1,14 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from sqlalchemy import or_
+from sqlalchemy import and_, case, func, or_, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from app.database import get_db
 from app.models.category_factor_mapping import CategoryFactorMapping
 from app.models.emission_factors import EmissionFactor
-from app.schemas.emission_factors import EmissionFactorCreate
+from app.schemas.emission_factors import EmissionFactorCreate, EmissionFactorRead
 from app.services.emission_calculator import calculate_emissions
 from app.routers.auth import get_current_user, User
+from app.services.geography import normalize_geography
+from app.services.factor_store import bump_factor_version
 
 router = APIRouter(prefix="/emission-factors", tags=["Emission Factors"])
 
@@ -28,6 +31,8 @@ def create_factor(
         db.add(factor)
         db.commit()
         db.refresh(factor)
+        # User factors never feed the shared factor store; only seeding retires it
+        bump_factor_version(db)
         return factor
     except IntegrityError:
         db.rollback()
@@ -46,6 +51,67 @@ def list_factors(
         )
     ).all()
 
+@router.get("/search", response_model=list[EmissionFactorRead])
+def search_factors(
+    q: str = Query(..., min_length=1),
+    provider: Optional[str] = None,
+    geography: Optional[str] = None,
+    year: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Ranked name / external_id matches for the mapping dropdown."""
+    term = q.strip()
+    # Seeded catalogues (Open CEDA, EPA) are owned by the system user the seed scripts create
+    system_owners = select(User.id).where(User.provider == "system")
+    query = db.query(EmissionFactor).filter(
+        or_(
+            EmissionFactor.owner_id == None,
+            EmissionFactor.owner_id == current_user.id,
+            EmissionFactor.owner_id.in_(system_owners)
+        )
+    )
+
+    if provider:
+        query = query.filter(EmissionFactor.provider == provider)
+    if geography:
+        query = query.filter(EmissionFactor.geo_key == normalize_geography(geography))
+    if year:
+        query = query.filter(EmissionFactor.year == year)
+
+    if db.get_bind().dialect.name == "postgresql":
+        # pg_trgm: fuzzy, typo-tolerant ranking served by the GIN trigram indexes
+        score = func.greatest(
+            func.similarity(EmissionFactor.name, term),
+            func.similarity(func.coalesce(EmissionFactor.external_id, ""), term)
+        )
+        query = query.filter(
+            or_(
+                EmissionFactor.name.op("%")(term),
+                EmissionFactor.name.icontains(term, autoescape=True),
+                EmissionFactor.external_id.istartswith(term, autoescape=True)
+            )
+        ).order_by(score.desc(), EmissionFactor.name)
+    else:
+        # Prefix match as a range over lower(...) so the expression indexes are used
+        needle = term.lower()
+        name_key = func.lower(EmissionFactor.name)
+        ext_key = func.lower(EmissionFactor.external_id)
+        name_prefix = and_(name_key >= needle, name_key < needle + "\uffff")
+        ext_prefix = and_(ext_key >= needle, ext_key < needle + "\uffff")
+        rank = case(
+            (ext_key == needle, 0),
+            (name_key == needle, 1),
+            (ext_prefix, 2),
+            else_=3
+        )
+        query = query.filter(or_(name_prefix, ext_prefix)).order_by(
+            rank, func.length(EmissionFactor.name), EmissionFactor.name
+        )
+
+    return query.limit(limit).all()
+
 @router.post("/map-category", response_model=dict)
 def map_category(
     payload: CategoryMapRequest,
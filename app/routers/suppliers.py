@@ -1,18 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from app.database import get_db
-from app.models.spend import SpendRecord
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_async_db
 from app.models.supplier import Supplier
-from app.schemas.supplier import SupplierCreate, SupplierRead, SupplierUpdate
-from app.routers.auth import get_current_user, User
-from app.services.tree_rollup import get_supplier_tree_rollup
+from app.schemas.supplier import (
+    SupplierCreate, SupplierRead, SupplierUpdate, SupplierTreeNode,
+    SupplierBulkUpdate, SupplierBulkDelete, HierarchyImport
+)
+from app.routers.auth import get_current_user, get_current_user_async, User
+from app.services.tree_rollup import get_supplier_tree_rollup, get_supplier_rankings_async, get_supplier_tree
 from app.services.parent_child_circular import creates_cycle
+from app.services.fast_json import rows_response
+from app.services.supplier_factor import resolve_unresolved_suppliers
+from app.services.supplier_hierarchy import import_hierarchy
+from app.services.supplier_bulk import bulk_update_suppliers, bulk_delete_suppliers
 from uuid import UUID
 
 router = APIRouter(prefix="/suppliers", tags=["Suppliers"])
 
+SUPPLIER_READ_COLUMNS = list(SupplierRead.model_fields.keys())
+
 @router.post("/", response_model=SupplierRead)
 def create_supplier(
     payload: SupplierCreate, 
@@ -66,35 +75,101 @@ def create_supplier(
 
 @router.get("/", response_model=list[SupplierRead])
 def list_suppliers(
+    fast: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    # Fast path: plain row tuples encoded with orjson
+    if fast:
+        rows = db.query(
+            *[getattr(Supplier, column) for column in SUPPLIER_READ_COLUMNS]
+        ).filter(Supplier.owner_id == current_user.id).all()
+        return rows_response(SUPPLIER_READ_COLUMNS, rows)
+
     # List only your suppliers
     return db.query(Supplier).filter(Supplier.owner_id == current_user.id).all()
 
 @router.get("/dashboard-stats")
-def supplier_dashboard_stats(
+async def supplier_dashboard_stats(
+    top: Optional[int] = Query(None, ge=1, le=1000),
+    sort: Literal["co2e", "spend", "name"] = "co2e",
+    rollup: Optional[Literal["subtree"]] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    # Ranking and truncation are done by the database, not the client
+    return await get_supplier_rankings_async(
+        db,
+        current_user.id,
+        top=top,
+        sort=sort,
+        rollup=rollup
+    )
+
+
+@router.get("/tree", response_model=list[SupplierTreeNode])
+def supplier_tree(
+    root_id: Optional[UUID] = None,
+    max_depth: Optional[int] = Query(None, ge=0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    tree = get_supplier_tree(db, current_user.id, root_id=root_id, max_depth=max_depth)
+    if root_id is not None and not tree:
+        raise HTTPException(status_code=404, detail="Supplier not found")
+    return tree
+
+
+@router.post("/resolve-factors")
+def resolve_supplier_factors(
+    chunk_size: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # Batch resolve every supplier that has no emission factor yet
+    return resolve_unresolved_suppliers(db, current_user.id, chunk_size=chunk_size)
+
+
+@router.post("/hierarchy/import")
+def import_supplier_hierarchy(
+    payload: HierarchyImport,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # All edges are validated together; nothing is written if any edge is rejected
+    result = import_hierarchy(db, current_user.id, payload.edges)
+    if result["error_count"]:
+        raise HTTPException(status_code=400, detail=result)
+    return result
+
+
+@router.patch("/bulk")
+def bulk_update(
+    payload: SupplierBulkUpdate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    stats = db.query(
-        Supplier.id,
-        Supplier.supplier_name,
-        func.sum(SpendRecord.calculated_co2e).label("total_co2e")
-    ).outerjoin(
-        SpendRecord, Supplier.id == SpendRecord.supplier_id
-    ).filter(
-        Supplier.owner_id == current_user.id
-    ).group_by(
-        Supplier.id
-    ).all()
+    # Declared before /{supplier_id} so "bulk" is not parsed as an id
+    try:
+        return {"results": bulk_update_suppliers(db, current_user.id, payload.updates)}
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Bulk update violates a constraint")
+
 
-    return [{"id": str(s.id), "supplier_name": s.supplier_name, "total_co2e": s.total_co2e or 0} for s in stats]
+@router.delete("/bulk")
+def bulk_delete(
+    payload: SupplierBulkDelete,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return {"results": bulk_delete_suppliers(db, current_user.id, payload.ids)}
 
 
 @router.get("/{supplier_id}/enterprise-rollup")
 def enterprise_rollup(
-    supplier_id: str, 
+    supplier_id: UUID,
+    max_depth: Optional[int] = Query(None, ge=0),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -107,7 +182,7 @@ def enterprise_rollup(
     if not supplier:
         raise HTTPException(status_code=404, detail="Supplier not found")
         
-    return get_supplier_tree_rollup(db, supplier_id)
+    return get_supplier_tree_rollup(db, supplier_id, max_depth=max_depth)
 
 
 @router.patch("/{supplier_id}", response_model=SupplierRead)
@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from typing import Optional
+from uuid import UUID
+from datetime import datetime
+
+
+class SupplierDisclosureRead(BaseModel):
+    id: UUID
+    company_name: Optional[str] = None
+    domain: Optional[str] = None
+    reporting_year: int
+    revenue_usd: float
+    scope_1_tco2e: Optional[float] = None
+    scope_2_market_tco2e: Optional[float] = None
+    scope_2_location_tco2e: Optional[float] = None
+    scope_3_total_tco2e: Optional[float] = None
+    co2e_intensity: Optional[float] = None
+    scope_1_intensity: Optional[float] = None
+    scope_2_intensity: Optional[float] = None
+    scope_3_intensity: Optional[float] = None
+    assurance_level: Optional[str] = None
+    source_url: Optional[str] = None
+    emission_factor_id: Optional[UUID] = None
+    ingested_at: datetime
+
+    class Config:
+        from_attributes = True
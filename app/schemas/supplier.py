@@ -26,6 +26,10 @@ class SupplierRead(SupplierBase):
         from_attributes = True
 
 
+class SupplierTreeNode(SupplierRead):
+    children: list["SupplierTreeNode"] = []
+
+
 class SupplierUpdate(BaseModel):
     supplier_name: Optional[str] = None
     domain: Optional[str] = None
@@ -33,3 +37,27 @@ class SupplierUpdate(BaseModel):
     region: Optional[str] = None
     sbti_status: Optional[str] = None
     parent_id: Optional[UUID] = None
+
+
+class SupplierBulkUpdateItem(SupplierUpdate):
+    id: UUID
+
+
+class SupplierBulkUpdate(BaseModel):
+    updates: list[SupplierBulkUpdateItem]
+
+
+class SupplierBulkDelete(BaseModel):
+    ids: list[UUID]
+
+
+class HierarchyEdge(BaseModel):
+    """A (child, parent) pair; each side is given by id or by supplier name."""
+    child_id: Optional[UUID] = None
+    child_name: Optional[str] = None
+    parent_id: Optional[UUID] = None
+    parent_name: Optional[str] = None
+
+
+class HierarchyImport(BaseModel):
+    edges: list[HierarchyEdge]
@@ -0,0 +1,70 @@
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from app.models.spend import SpendRecord
+from app.schemas.spend import SpendRead
+from app.services.fast_json import rows_response
+
+COLUMNS = list(SpendRead.model_fields.keys())
+SIZES = [10_000, 100_000]
+
+
+def build_records(n: int) -> list[SpendRecord]:
+    supplier_id = uuid.uuid4()
+    factor_id = uuid.uuid4()
+    owner_id = uuid.uuid4()
+    now = datetime.utcnow()
+    return [
+        SpendRecord(
+            spend_id=i,
+            supplier_id=supplier_id,
+            category_code="1111A0",
+            fiscal_year=2024,
+            spend_amount=Decimal("1250.50"),
+            currency="USD",
+            calculated_co2e=Decimal("312.6250"),
+            calculated_scope_1=Decimal("10.0000"),
+            calculated_scope_2=Decimal("20.0000"),
+            calculated_scope_3=Decimal("282.6250"),
+            factor_used_id=factor_id,
+            calculated_at=now,
+            calculation_method="CEDA_Global_Fallback",
+            owner_id=owner_id
+        )
+        for i in range(n)
+    ]
+
+
+def standard_path(records: list[SpendRecord]) -> bytes:
+    # What FastAPI does for response_model=list[SpendRead]
+    validated = TypeAdapter(list[SpendRead]).validate_python(records, from_attributes=True)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def fast_path(rows: list[tuple]) -> bytes:
+    return rows_response(COLUMNS, rows).body
+
+
+def timed(fn, arg) -> float:
+    start = time.perf_counter()
+    fn(arg)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'rows':>8} {'standard (s)':>14} {'fast (s)':>10} {'speedup':>8}")
+    for n in SIZES:
+        records = build_records(n)
+        rows = [tuple(getattr(r, c) for c in COLUMNS) for r in records]
+
+        standard = timed(standard_path, records)
+        fast = timed(fast_path, rows)
+        print(f"{n:>8} {standard:>14.3f} {fast:>10.3f} {standard / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+import sys
+import time
+from pathlib import Path
+from app.services.ceda_snapshot import compile_snapshot, read_snapshot
+
+def main(xlsx_path: Path) -> None:
+    start = time.perf_counter()
+    path = compile_snapshot(xlsx_path)
+    snapshot = read_snapshot(path)
+    elapsed = time.perf_counter() - start
+
+    print(f"Snapshot {snapshot.sha256[:12]}: {len(snapshot.country_names)} countries x {len(snapshot.sector_codes)} sectors")
+    print(f"Written to {path} in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    default_xlsx = Path(__file__).resolve().parent.parent.parent / "data" / "Open CEDA 2025.xlsx"
+    main(Path(sys.argv[1]) if len(sys.argv) > 1 else default_xlsx)
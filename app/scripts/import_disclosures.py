@@ -0,0 +1,28 @@
+import sys
+from pathlib import Path
+from app.database import SessionLocal
+from app.models.user import User
+from app.services.disclosure_registry import import_disclosures, read_disclosure_file
+
+def main(path: Path, owner_email: str):
+    session = SessionLocal()
+    try:
+        owner = session.query(User).filter(User.email == owner_email).first()
+        if not owner:
+            print(f"No user found with email {owner_email}")
+            sys.exit(1)
+
+        rows = read_disclosure_file(path.name, path.read_bytes())
+        report = import_disclosures(session, rows, owner.id)
+        print(f"Imported {report['inserted']} new and {report['updated']} updated disclosures "
+              f"({report['error_count']} rows rejected).")
+        for error in report["errors"]:
+            print(f"  {error}")
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python -m app.scripts.import_disclosures <disclosures.csv|xlsx> <owner_email>")
+        sys.exit(1)
+    main(Path(sys.argv[1]), sys.argv[2])
@@ -0,0 +1,72 @@
+import asyncio
+import statistics
+import sys
+import time
+import httpx
+
+EMAIL = "loadtest@example.com"
+PASSWORD = "loadtest-password"
+CONCURRENCY_LEVELS = [10, 50, 100, 200]
+
+# Served by the async session, plus a sync endpoint of similar cost for reference
+ENDPOINTS = [
+    "/spend/summary",
+    "/spend/coverage",
+    "/spend/categories",
+    "/suppliers/dashboard-stats?top=20",
+    "/spend/coverage/breakdown",
+]
+
+
+async def hammer(client: httpx.AsyncClient, path: str, headers: dict, concurrency: int, seconds: float) -> dict:
+    """Requests `path` from `concurrency` clients for `seconds`; returns latencies and failures."""
+    samples, failures = [], 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        nonlocal failures
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                res = await client.get(path, headers=headers)
+                ok = res.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                samples.append((time.perf_counter() - start) * 1000)
+            else:
+                failures += 1
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return {"samples": samples, "failures": failures, "seconds": seconds}
+
+
+def summarize(path: str, concurrency: int, result: dict) -> None:
+    samples = sorted(result["samples"])
+    if not samples:
+        print(f"{path:<36} c={concurrency:<4d} no successful requests, {result['failures']} failed")
+        return
+    p95 = samples[int(len(samples) * 0.95) - 1] if len(samples) >= 20 else samples[-1]
+    print(f"{path:<36} c={concurrency:<4d} {len(samples) / result['seconds']:8.1f} req/s  "
+          f"p50={statistics.median(samples):8.1f} ms  p95={p95:8.1f} ms  failed={result['failures']}")
+
+
+async def run(base_url: str, seconds: float) -> None:
+    limits = httpx.Limits(max_connections=max(CONCURRENCY_LEVELS) + 10)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as client:
+        await client.post("/auth/signup", json={"email": EMAIL, "password": PASSWORD})
+        token = (await client.post("/auth/login", data={"username": EMAIL, "password": PASSWORD})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        # Run once against the build before the async port and once after; the
+        # sync reference endpoint shows where the threadpool/pool limit kicks in
+        for path in ENDPOINTS:
+            for concurrency in CONCURRENCY_LEVELS:
+                summarize(path, concurrency, await hammer(client, path, headers, concurrency, seconds))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m app.scripts.load_test_dashboard <base_url> [seconds_per_level]")
+        sys.exit(1)
+    asyncio.run(run(sys.argv[1], float(sys.argv[2]) if len(sys.argv) > 2 else 5))
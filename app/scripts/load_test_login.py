@@ -0,0 +1,81 @@
+import asyncio
+import statistics
+import sys
+import time
+import httpx
+
+EMAIL = "loadtest@example.com"
+PASSWORD = "loadtest-password"
+PROBE_INTERVAL = 0.05
+
+
+async def probe_latency(client: httpx.AsyncClient, headers: dict, stop: asyncio.Event) -> list[float]:
+    """Latencies (ms) of a cheap authenticated endpoint until stop is set."""
+    samples = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/auth/me", headers=headers)
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(PROBE_INTERVAL)
+    return samples
+
+
+async def login_storm(client: httpx.AsyncClient, concurrency: int, seconds: float) -> dict:
+    counts = {"ok": 0, "busy": 0, "other": 0}
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            res = await client.post("/auth/login", data={"username": EMAIL, "password": PASSWORD})
+            key = "ok" if res.status_code == 200 else "busy" if res.status_code == 503 else "other"
+            counts[key] += 1
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return counts
+
+
+def summarize(label: str, samples: list[float]) -> None:
+    if not samples:
+        print(f"{label:>14}: no samples")
+        return
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1] if len(ordered) >= 20 else ordered[-1]
+    print(f"{label:>14}: n={len(samples):4d}  p50={statistics.median(samples):8.1f} ms  p95={p95:8.1f} ms")
+
+
+async def run(base_url: str, concurrency: int, seconds: float) -> None:
+    limits = httpx.Limits(max_connections=concurrency + 10)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        await client.post("/auth/signup", json={"email": EMAIL, "password": PASSWORD})
+        token = (await client.post("/auth/login", data={"username": EMAIL, "password": PASSWORD})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        # Baseline without logins
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_latency(client, headers, stop))
+        await asyncio.sleep(seconds)
+        stop.set()
+        baseline = await probe
+
+        # Same probe during a login storm
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_latency(client, headers, stop))
+        counts = await login_storm(client, concurrency, seconds)
+        stop.set()
+        during = await probe
+
+    print(f"Login storm: {concurrency} concurrent clients for {seconds:.0f}s -> "
+          f"{counts['ok']} ok, {counts['busy']} rejected as busy (503), {counts['other']} other")
+    summarize("baseline", baseline)
+    summarize("during storm", during)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m app.scripts.load_test_login <base_url> [concurrency] [seconds]")
+        sys.exit(1)
+    asyncio.run(run(
+        sys.argv[1],
+        int(sys.argv[2]) if len(sys.argv) > 2 else 50,
+        float(sys.argv[3]) if len(sys.argv) > 3 else 10
+    ))
@@ -0,0 +1,25 @@
+import sys
+from app.database import SessionLocal
+from app.models.user import User
+from app.services.supplier_factor import resolve_unresolved_suppliers
+
+def main(owner_email: str, chunk_size: int = 1000):
+    session = SessionLocal()
+    try:
+        owner = session.query(User).filter(User.email == owner_email).first()
+        if not owner:
+            print(f"No user found with email {owner_email}")
+            sys.exit(1)
+
+        report = resolve_unresolved_suppliers(session, owner.id, chunk_size=chunk_size)
+        print(f"Resolved {report['verified']} verified and {report['fuzzy']} fuzzy matches "
+              f"out of {report['processed']} suppliers ({report['unresolved']} unresolved, "
+              f"{report['factors_created']} synthetic factors created).")
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m app.scripts.resolve_supplier_factors <owner_email> [chunk_size]")
+        sys.exit(1)
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
@@ -1,7 +1,237 @@
+import multiprocessing as mp
+import queue
 import sys
+import time
 from pathlib import Path
-from app.scripts.seed_ceda_categories import seed_ceda_categories
-from app.scripts.seed_ceda_factors import seed_ceda_factors
+import openpyxl
+from sqlalchemy.orm import Session, sessionmaker
+from app.database import engine
+from app.models.category import Category
+from app.models.emission_factors import EmissionFactor
+from app.scripts.seed_ceda_categories import iter_ceda_categories, insert_categories
+from app.scripts.seed_ceda_factors import (
+    CheckpointedFactorWriter, get_system_user, iter_row_factors, iter_new_factor_rows
+)
+from app.services.ceda_snapshot import (
+    build_snapshot, iter_raw_sheet, read_conversions, read_snapshot, sector_multipliers, snapshot_path,
+    workbook_sha256, write_snapshot
+)
+from app.services.factor_store import publish_factor_store
+
+# Bounded queue: parsers block instead of buffering a whole sheet in memory
+QUEUE_SIZE = 8
+CATEGORY_BATCH = 500
+COUNTRY_BATCH = 10
+# How often a silent worker is checked for having died (OOM, segfault, kill)
+POLL_SECONDS = 5
+
+def parse_categories_worker(xlsx_path: Path, out: mp.Queue) -> None:
+    """Worker process: stream Metadata sheet categories in batches."""
+    try:
+        start = time.perf_counter()
+        batch = []
+        for pair in iter_ceda_categories(xlsx_path):
+            batch.append(pair)
+            if len(batch) >= CATEGORY_BATCH:
+                out.put(("categories", "batch", batch))
+                batch = []
+        if batch:
+            out.put(("categories", "batch", batch))
+        out.put(("categories", "done", time.perf_counter() - start))
+    except Exception as e:
+        out.put(("categories", "error", f"Metadata sheet: {e}"))
+
+def parse_conversions_worker(xlsx_path: Path, out: mp.Queue) -> None:
+    """Worker process: read the Conversion sheet's per-sector multipliers."""
+    try:
+        start = time.perf_counter()
+        wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
+        try:
+            out.put(("conversions", "conversions", read_conversions(wb)))
+        finally:
+            wb.close()
+        out.put(("conversions", "done", time.perf_counter() - start))
+    except Exception as e:
+        out.put(("conversions", "error", f"Conversion sheet: {e}"))
+
+def parse_raw_worker(xlsx_path: Path, out: mp.Queue) -> None:
+    """
+    Worker process: stream Raw sheet rows in batches.
+    Reads the compiled snapshot when one exists; otherwise parses the
+    workbook and writes the snapshot once it is complete.
+    """
+    try:
+        start = time.perf_counter()
+        sha256 = workbook_sha256(xlsx_path)
+        cached = snapshot_path(sha256)
+
+        out.put(("raw", "workbook", sha256))
+
+        if cached.exists():
+            snapshot = read_snapshot(cached)
+            out.put(("raw", "sectors", snapshot.sector_codes.tolist()))
+            for i in range(0, len(snapshot.country_names), COUNTRY_BATCH):
+                out.put(("raw", "countries", list(zip(
+                    snapshot.country_names[i:i + COUNTRY_BATCH].tolist(),
+                    snapshot.matrix[i:i + COUNTRY_BATCH].tolist()
+                ))))
+        else:
+            wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
+            try:
+                items, batch = [], []
+                for item in iter_raw_sheet(wb):
+                    items.append(item)
+                    if item[0] == "sectors":
+                        out.put(("raw", "sectors", item[1]))
+                    else:
+                        batch.append((item[2], item[3]))
+                        if len(batch) >= COUNTRY_BATCH:
+                            out.put(("raw", "countries", batch))
+                            batch = []
+                if batch:
+                    out.put(("raw", "countries", batch))
+                # The snapshot stores multipliers too; the Conversion sheet is small, so read it again here
+                items[0] = ("sectors", items[0][1], sector_multipliers(items[0][1], read_conversions(wb)))
+            finally:
+                wb.close()
+            write_snapshot(build_snapshot(sha256, items))
+
+        out.put(("raw", "done", time.perf_counter() - start))
+    except Exception as e:
+        out.put(("raw", "error", f"Raw sheet: {e}"))
+
+def next_message(source: mp.Queue, workers: dict[str, mp.Process]) -> tuple:
+    """
+    Next (worker, kind, payload) message from the shared queue; raises if a
+    worker that has not reported "done" dies without reporting.
+    """
+    while True:
+        try:
+            name, kind, *payload = source.get(timeout=POLL_SECONDS)
+            break
+        except queue.Empty:
+            dead = [worker for worker in workers.values() if not worker.is_alive()]
+            if not dead:
+                continue
+            # Drain anything it posted just before exiting
+            try:
+                name, kind, *payload = source.get(timeout=1)
+                break
+            except queue.Empty:
+                raise RuntimeError(f"{dead[0].name} exited with code {dead[0].exitcode} without reporting")
+    if kind == "error":
+        raise RuntimeError(payload[0])
+    return name, kind, payload
+
+def run_pipeline(excel_path: Path) -> dict:
+    timings = {}
+    wall_start = time.perf_counter()
+
+    ctx = mp.get_context("spawn")
+    messages = ctx.Queue(maxsize=QUEUE_SIZE)
+    workers = {
+        "categories": ctx.Process(
+            target=parse_categories_worker, args=(excel_path, messages), name="Metadata parser", daemon=True
+        ),
+        "conversions": ctx.Process(
+            target=parse_conversions_worker, args=(excel_path, messages), name="Conversion parser", daemon=True
+        ),
+        "raw": ctx.Process(
+            target=parse_raw_worker, args=(excel_path, messages), name="Raw parser", daemon=True
+        ),
+    }
+    for worker in workers.values():
+        worker.start()
+
+    try:
+        print("Seeding CEDA categories and global emission factors...")
+        start = time.perf_counter()
+        with Session(engine) as session:
+            sys_user_id = get_system_user(session)
+            category_map = {c.category_id: c.category_name for c in session.query(Category).all()}
+            existing_set = set(session.query(EmissionFactor.external_id, EmissionFactor.geography).all())
+        timings["load existing factors"] = time.perf_counter() - start
+
+        # All three sheets parse in parallel. Categories are inserted as their batches
+        # arrive; country rows are held back only until the writer, the multipliers and
+        # the category names for their sector codes are known, then stream to the
+        # database with the same batching and checkpoint/resume as seed_ceda_factors.
+        running = dict(workers)
+        writer = None
+        sector_codes, multipliers, conversions = None, None, None
+        pending = []
+        country_idx = 0
+        added_categories = 0
+        category_seconds = 0.0
+        wait_seconds = 0.0
+
+        def factors_ready() -> bool:
+            return (
+                writer is not None and sector_codes is not None and conversions is not None
+                and ("categories" not in running or category_map.keys() >= set(sector_codes))
+            )
+
+        while running:
+            start = time.perf_counter()
+            name, kind, payload = next_message(messages, running)
+            wait_seconds += time.perf_counter() - start
+
+            if kind == "done":
+                del running[name]
+                timings[f"parse {workers[name].name.removesuffix(' parser')} sheet"] = payload[0]
+            elif kind == "batch":
+                start = time.perf_counter()
+                added_categories += insert_categories(payload[0])
+                category_seconds += time.perf_counter() - start
+                for code, category_name in payload[0]:
+                    category_map.setdefault(code, category_name)
+            elif kind == "conversions":
+                conversions = payload[0]
+            elif kind == "workbook":
+                writer = CheckpointedFactorWriter(excel_path, payload[0])
+                if writer.rows_done:
+                    print(f"   Resuming from checkpoint: skipping {writer.rows_done} committed country rows.")
+            elif kind == "sectors":
+                sector_codes = payload[0]
+            else:
+                pending.extend(payload[0])
+
+            if pending and factors_ready():
+                if multipliers is None:
+                    multipliers = sector_multipliers(sector_codes, conversions)
+                for country_name, values in pending:
+                    country_idx += 1
+                    if country_idx <= writer.rows_done:
+                        continue
+                    writer.add_country(iter_new_factor_rows(
+                        iter_row_factors(sector_codes, multipliers, country_name, values),
+                        category_map, existing_set, sys_user_id
+                    ), country_idx)
+                pending = []
+
+        timings["insert categories"] = category_seconds
+        print(f"✅ Added {added_categories} CEDA categories.")
+
+        inserted = writer.finish()
+        timings["insert factors"] = writer.seconds
+        timings["waiting on parsers"] = wait_seconds
+
+        publish_factor_store(sessionmaker(bind=engine))
+        print(f"✅ Added {inserted} Global Open CEDA factors.\n")
+    finally:
+        for worker in workers.values():
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+
+    timings["total (wall clock)"] = time.perf_counter() - wall_start
+    return timings
+
+def print_timings(timings: dict) -> None:
+    print("⏱️  Stage timings:")
+    width = max(len(stage) for stage in timings)
+    for stage, seconds in timings.items():
+        print(f"   {stage.ljust(width)}  {seconds:8.2f}s")
 
 def main():
     print("Starting manual database seed process...")
@@ -17,15 +247,10 @@ def main():
 
         print(f"📁 Found Excel File: {excel_path.name}\n")
 
-        print("1. Seeding CEDA Categories (Master Taxonomy)...")
-        seed_ceda_categories(excel_path)
-        print("✅ Categories seeded successfully!\n")
-
-        print("2. Seeding Global CEDA Emission Factors (This may take a few minutes)...")
-        seed_ceda_factors(excel_path)
-        print("✅ Emission factors seeded successfully!\n")
+        timings = run_pipeline(excel_path)
 
-        print("🎉 Database seeding completed successfully!")
+        print("🎉 Database seeding completed successfully!\n")
+        print_timings(timings)
         
     except Exception as e:
         print(f"❌ An error occurred during seeding: {e}")
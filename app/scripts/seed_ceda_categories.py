@@ -1,6 +1,7 @@
 import openpyxl
 import re
 from pathlib import Path
+from typing import Iterable, Iterator
 from sqlalchemy.orm import Session
 from app.database import engine
 from app.models.category import Category
@@ -16,44 +17,63 @@ def pick_header(headers: list, candidates: list) -> str:
             return normalized_map[candidate_norm]
     return ""
 
-def seed_ceda_categories(xlsx_path: Path) -> None:
+def iter_ceda_categories(xlsx_path: Path) -> Iterator[tuple[str, str]]:
+    """Stream (sector code, sector name) pairs from the Metadata sheet."""
     wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
-    
-    # We now know the EXACT name of the sheet from your terminal output
-    ws = wb["Metadata"]
-    rows = ws.iter_rows(values_only=True)
-    
-    # Seek headers
-    headers = []
-    for row in rows:
-        row_strs = [str(cell).strip() if cell is not None else "" for cell in row]
-        row_lower = [c.lower() for c in row_strs]
-        if any("sector code" in c or "sector name" in c for c in row_lower):
-            headers = row_strs
-            break
-            
-    print(f"📋 Detected Category Headers: {headers[:5]}...")
-
-    code_col = pick_header(headers, ["Sector Code", "Sector", "Sector ID"])
-    name_col = pick_header(headers, ["Sector Name", "Sector", "Industry", "Description"])
+    try:
+        # We now know the EXACT name of the sheet from your terminal output
+        ws = wb["Metadata"]
+        rows = ws.iter_rows(values_only=True)
+        
+        # Seek headers
+        headers = []
+        for row in rows:
+            row_strs = [str(cell).strip() if cell is not None else "" for cell in row]
+            row_lower = [c.lower() for c in row_strs]
+            if any("sector code" in c or "sector name" in c for c in row_lower):
+                headers = row_strs
+                break
+                
+        print(f"📋 Detected Category Headers: {headers[:5]}...")
+
+        code_col = pick_header(headers, ["Sector Code", "Sector", "Sector ID"])
+        name_col = pick_header(headers, ["Sector Name", "Sector", "Industry", "Description"])
 
-    with Session(engine) as session:
-        added = 0
         for row in rows:
             row_dict = dict(zip(headers, row))
             sector_code = str(row_dict.get(code_col) or "").strip()
             sector_name = str(row_dict.get(name_col) or "").strip()
 
-            if not sector_code or not sector_name:
-                continue
+            if sector_code and sector_name:
+                yield sector_code, sector_name
+    finally:
+        wb.close()
 
-            if not session.get(Category, sector_code):
+def insert_categories(pairs: Iterable[tuple[str, str]]) -> int:
+    """Insert categories that do not exist yet; returns how many were added."""
+    pairs = list(pairs)
+    if not pairs:
+        return 0
+
+    with Session(engine) as session:
+        codes = {code for code, _ in pairs}
+        existing = {
+            code for (code,) in session.query(Category.category_id).filter(Category.category_id.in_(codes))
+        }
+
+        added = 0
+        for sector_code, sector_name in pairs:
+            if sector_code not in existing:
                 session.add(Category(category_id=sector_code, category_name=sector_name))
+                existing.add(sector_code)
                 added += 1
         
         session.commit()
-        print(f"✅ Added {added} CEDA categories.")
-    wb.close()
+    return added
+
+def seed_ceda_categories(xlsx_path: Path) -> None:
+    added = insert_categories(iter_ceda_categories(xlsx_path))
+    print(f"✅ Added {added} CEDA categories.")
 
 if __name__ == "__main__":
     default_xlsx = Path(__file__).resolve().parent.parent.parent / "data" / "Open CEDA 2025.xlsx"
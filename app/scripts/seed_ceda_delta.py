@@ -0,0 +1,141 @@
+import sys
+import time
+from decimal import Decimal, ROUND_HALF_UP
+from pathlib import Path
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session, sessionmaker
+from app.database import engine
+from app.models.category import Category
+from app.models.emission_factors import EmissionFactor
+from app.scripts.seed_ceda_factors import (
+    PROVIDER, YEAR, BATCH_SIZE, get_system_user, format_external_id,
+    iter_country_factors, build_factor_row
+)
+from app.services.ceda_snapshot import load_snapshot
+from app.services.factor_store import publish_factor_store
+
+# Matches the Numeric(14, 5) storage of co2e_per_unit
+FACTOR_PRECISION = Decimal("0.00001")
+
+def load_release(snapshot) -> dict:
+    """(external_id, geography) -> (sector code, factor) for every usable cell of a release."""
+    release = {}
+    for country_idx in range(len(snapshot.country_names)):
+        for code, country_name, final_ef in iter_country_factors(snapshot, country_idx):
+            release.setdefault((format_external_id(code), country_name), (code, final_ef))
+    return release
+
+def load_stored(session: Session, sys_user_id) -> tuple[dict, list]:
+    """
+    The system user's Open CEDA factors as {(external_id, geography): (id, co2e)},
+    plus the keys stored more than once. Users' private factors are never diffed.
+    """
+    stored, duplicates = {}, set()
+    for factor_id, ext_id, geography, value in session.query(
+        EmissionFactor.id,
+        EmissionFactor.external_id,
+        EmissionFactor.geography,
+        EmissionFactor.co2e_per_unit
+    ).filter(
+        EmissionFactor.provider == PROVIDER,
+        EmissionFactor.owner_id == sys_user_id
+    ):
+        key = (ext_id, geography)
+        if key in stored:
+            duplicates.add(key)
+        stored[key] = (factor_id, value)
+
+    # Ambiguous keys are reported, never updated or re-added
+    for key in duplicates:
+        del stored[key]
+    return stored, sorted(duplicates)
+
+def diff_release(stored: dict, incoming: dict, skip=()) -> tuple[list, list, list]:
+    """
+    Compare stored factors {(external_id, geography): (id, co2e)} with an incoming
+    release {(external_id, geography): (code, co2e)}. Keys in skip are ignored.
+    Returns (added keys, changed (id, key) pairs, removed keys).
+    """
+    skip = set(skip)
+    added = [key for key in incoming if key not in stored and key not in skip]
+    removed = [key for key in stored if key not in incoming]
+
+    changed = []
+    for key, (factor_id, stored_value) in stored.items():
+        if key not in incoming:
+            continue
+        new_value = incoming[key][1]
+        # Round the way the database does (half away from zero) before comparing
+        if (Decimal(str(stored_value)).quantize(FACTOR_PRECISION, ROUND_HALF_UP)
+                != new_value.quantize(FACTOR_PRECISION, ROUND_HALF_UP)):
+            changed.append((factor_id, key))
+
+    return added, changed, removed
+
+def seed_ceda_delta(xlsx_path: Path, version: str, year: int = YEAR) -> dict:
+    """
+    Apply a new Open CEDA release on top of the stored one.
+
+    Only new and changed factors are written (under the new version); factors
+    missing from the release are reported but kept, since spend records may
+    still reference them. Changed factors are updated in place, so the prior
+    value and version are not kept. Keys stored more than once are reported
+    and left alone.
+
+    Updates and inserts share one transaction, so a release lands all or
+    nothing; the factor store is republished only after it commits.
+    """
+    start = time.perf_counter()
+    incoming = load_release(load_snapshot(xlsx_path))
+
+    with Session(engine) as session:
+        sys_user_id = get_system_user(session)
+        category_map = {c.category_id: c.category_name for c in session.query(Category).all()}
+
+        stored, duplicates = load_stored(session, sys_user_id)
+        added, changed, removed = diff_release(stored, incoming, skip=duplicates)
+
+        # Bulk UPDATE by primary key (executemany), one statement per batch
+        for i in range(0, len(changed), BATCH_SIZE):
+            session.execute(update(EmissionFactor), [
+                {
+                    "id": factor_id,
+                    "co2e_per_unit": incoming[key][1],
+                    "scope_3_intensity": incoming[key][1],
+                    "version": version,
+                    "year": year
+                }
+                for factor_id, key in changed[i:i + BATCH_SIZE]
+            ])
+
+        for i in range(0, len(added), BATCH_SIZE):
+            session.execute(insert(EmissionFactor.__table__), [
+                build_factor_row(incoming[key][0], key[1], incoming[key][1], category_map, sys_user_id, version, year)
+                for key in added[i:i + BATCH_SIZE]
+            ])
+        session.commit()
+
+    if added or changed:
+        publish_factor_store(sessionmaker(bind=engine))
+
+    report = {
+        "version": version,
+        "added": len(added),
+        "changed": len(changed),
+        "removed": len(removed),
+        "duplicates": len(duplicates),
+        "unchanged": len(incoming) - len(added) - len(changed) - len(set(duplicates) & incoming.keys()),
+        "seconds": round(time.perf_counter() - start, 2)
+    }
+    print(f"Delta seed {version}: {report['added']} added, {report['changed']} changed, "
+          f"{report['removed']} removed, {report['unchanged']} unchanged in {report['seconds']}s.")
+    if duplicates:
+        print(f"Skipped {len(duplicates)} (external_id, geography) keys stored more than once, e.g. "
+              + ", ".join(f"{ext_id}/{geography}" for ext_id, geography in duplicates[:10]))
+    return report
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python -m app.scripts.seed_ceda_delta <workbook.xlsx> <version> [year]")
+        sys.exit(1)
+    seed_ceda_delta(Path(sys.argv[1]), sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else YEAR)
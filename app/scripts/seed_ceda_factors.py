@@ -1,18 +1,24 @@
-import re
+import json
+import time
 import uuid
-import openpyxl
-from decimal import Decimal, InvalidOperation
+import numpy as np
+from decimal import Decimal
 from pathlib import Path
-from sqlalchemy.orm import Session
+from typing import Iterator
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, sessionmaker
 from app.database import engine
 from app.models.emission_factors import EmissionFactor
 from app.models.user import User
 from app.models.category import Category
+from app.services.ceda_snapshot import CedaSnapshot, load_snapshot
+from app.services.factor_store import publish_factor_store
 
 PROVIDER = "Open CEDA"
 UNIT_OF_MEASURE = "USD"
 YEAR = 2023
 VERSION = "2025-11-12"
+BATCH_SIZE = 5000
 
 def get_system_user(session: Session) -> uuid.UUID:
     sys_email = "system_epa@scopeops.local"
@@ -24,83 +30,133 @@ def get_system_user(session: Session) -> uuid.UUID:
         session.refresh(sys_user)
     return sys_user.id
 
-def parse_decimal(value: object) -> Decimal | None:
-    if value is None: return None
-    text = str(value).strip()
-    if not text or text.lower() in {"na", "n/a", "nan", "null"}: return None
-    cleaned = text.replace(",", "")
-    if cleaned.startswith("(") and cleaned.endswith(")"): cleaned = f"-{cleaned[1:-1]}"
-    try:
-        return Decimal(cleaned)
-    except (InvalidOperation, ValueError):
-        return None
-
 def format_external_id(sector_code: str) -> str:
     slug = sector_code.strip().upper()
     return f"OPEN-CEDA-2025-{slug}"
 
-def seed_ceda_factors(xlsx_path: Path) -> None:
-    wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
-    
-    sheet_conv = next((s for s in wb.sheetnames if "conversion" in s.lower()), None)
-    ws_conv = wb[sheet_conv]
-    
-    code_row = []
-    mult_row = []
-    
-    for row in ws_conv.iter_rows(values_only=True):
-        row_strs = [str(c).strip() if c is not None else "" for c in row]
-        row_lower = [x.lower() for x in row_strs]
-        
-        if any("1111a0" in x for x in row_lower):
-            code_row = row_strs
-        elif any("purchaser" in x and "producer" in x for x in row_lower) and len([x for x in row_strs if x]) > 5:
-            mult_row = row_strs
-            
-        if code_row and mult_row:
-            break
-            
-    conversions = {}
-    for code, mult_val in zip(code_row, mult_row):
-        code_str = code.strip()
-        if not code_str or code_str.lower() in ["sector name", "sector code", "purchaser - producer conversion", "source"]:
+def checkpoint_path(xlsx_path: Path) -> Path:
+    return xlsx_path.with_name(f"{xlsx_path.name}.seed-checkpoint.json")
+
+def load_checkpoint(xlsx_path: Path, sha256: str) -> int:
+    """Number of country rows already committed by an interrupted run of the same workbook."""
+    path = checkpoint_path(xlsx_path)
+    if not path.exists():
+        return 0
+    data = json.loads(path.read_text())
+    if data.get("version") != VERSION or data.get("sha256") != sha256:
+        return 0
+    return int(data.get("rows_done", 0))
+
+def save_checkpoint(xlsx_path: Path, sha256: str, rows_done: int) -> None:
+    checkpoint_path(xlsx_path).write_text(json.dumps({"version": VERSION, "sha256": sha256, "rows_done": rows_done}))
+
+def iter_row_factors(sector_codes, multipliers, country_name: str, base_row) -> Iterator[tuple[str, str, Decimal]]:
+    """Yield (sector code, country name, converted factor) for one country row of raw factors."""
+    base_row = np.asarray(base_row, dtype=np.float64)
+    multipliers = np.asarray(multipliers, dtype=np.float64)
+
+    # Blank, zero or unconverted cells are skipped, as in the sheet-based seed
+    usable = np.flatnonzero(
+        ~np.isnan(base_row) & (base_row != 0)
+        & ~np.isnan(multipliers) & (multipliers != 0)
+    )
+
+    for col_idx in usable:
+        code = str(sector_codes[col_idx])
+        final_ef = Decimal(repr(float(base_row[col_idx]))) * Decimal(repr(float(multipliers[col_idx])))
+        yield code, country_name, final_ef
+
+def iter_country_factors(snapshot: CedaSnapshot, country_idx: int) -> Iterator[tuple[str, str, Decimal]]:
+    """Yield (sector code, country name, converted factor) for one country row of the snapshot."""
+    return iter_row_factors(
+        snapshot.sector_codes,
+        snapshot.multipliers,
+        str(snapshot.country_names[country_idx]),
+        snapshot.matrix[country_idx]
+    )
+
+def build_factor_row(code: str, country_name: str, final_ef: Decimal, category_map: dict,
+                     sys_user_id: uuid.UUID, version: str = VERSION, year: int = YEAR) -> dict:
+    sector_name = category_map.get(code, f"Sector {code}")
+    return {
+        "id": uuid.uuid4(),
+        "external_id": format_external_id(code),
+        "provider": PROVIDER,
+        "name": f"{sector_name} ({code})",
+        "geography": country_name,
+        "year": year,
+        "unit_of_measure": UNIT_OF_MEASURE,
+        "co2e_per_unit": final_ef,
+        "scope_3_intensity": final_ef,
+        "owner_id": sys_user_id,
+        "version": version,
+        "methodology": f"Open CEDA 2025 Global Factors - {country_name}",
+    }
+
+def iter_new_factor_rows(factors, category_map: dict, existing_set: set, sys_user_id: uuid.UUID) -> Iterator[dict]:
+    """Turn (code, country, factor) triples into insert parameters for factors not stored yet."""
+    for code, country_name, final_ef in factors:
+        ext_id = format_external_id(code)
+
+        # Memory check instead of a database query; also skips duplicates inside the workbook
+        if (ext_id, country_name) in existing_set:
             continue
-            
-        mult = parse_decimal(mult_val)
-        if mult:
-            conversions[code_str] = mult
-
-    print(f"Extracted {len(conversions)} conversion multipliers.")
-
-
-    #  Process Raw Factors (Horizontal Matrix)
-    
-    sheet_raw = next((s for s in wb.sheetnames if "raw" in s.lower()), None)
-    ws_raw = wb[sheet_raw]
-    
-    codes_row = []
-    data_rows = []
-    found_headers = False
-    
-    for row in ws_raw.iter_rows(values_only=True):
-        row_strs = [str(c).strip() if c is not None else "" for c in row]
-        row_lower = [x.lower() for x in row_strs]
-        
-        if not found_headers:
-            if any("1111a0" in x for x in row_lower):
-                codes_row = row_strs
-                found_headers = True
-        else:
-            if any(row_strs):
-                data_rows.append(row_strs)
-                
-    print(f"Detected {len(data_rows)} Country Rows to process.")
-    wb.close()
-
-
-    # FAST In-Memory Data Prep & Bulk Insert
+        existing_set.add((ext_id, country_name))
+
+        yield build_factor_row(code, country_name, final_ef, category_map, sys_user_id)
+
+def iter_factor_rows(snapshot: CedaSnapshot, country_idx: int, category_map: dict,
+                     existing_set: set, sys_user_id: uuid.UUID) -> Iterator[dict]:
+    """Turn one country row of the compiled snapshot into emission_factors insert parameters."""
+    return iter_new_factor_rows(
+        iter_country_factors(snapshot, country_idx), category_map, existing_set, sys_user_id
+    )
+
+def write_batch(batch: list[dict]) -> None:
+    # Core executemany; a fresh connection per batch keeps long seeds from timing out
+    with engine.begin() as conn:
+        conn.execute(insert(EmissionFactor.__table__), batch)
+
+class CheckpointedFactorWriter:
+    """
+    Buffers factor rows and commits them in BATCH_SIZE batches, flushing only
+    on country-row boundaries and checkpointing the number of committed rows,
+    so an interrupted seed of the same workbook resumes where it stopped.
+    """
+
+    def __init__(self, xlsx_path: Path, sha256: str):
+        self.xlsx_path = xlsx_path
+        self.sha256 = sha256
+        self.rows_done = load_checkpoint(xlsx_path, sha256)
+        self.pending = []
+        self.inserted = 0
+        self.seconds = 0.0
+
+    def add_country(self, rows: Iterator[dict], rows_done: int) -> None:
+        """Queue one country row's factors; rows_done counts country rows up to and including it."""
+        self.pending.extend(rows)
+        if len(self.pending) >= BATCH_SIZE:
+            self._write()
+            save_checkpoint(self.xlsx_path, self.sha256, rows_done)
+            print(f"   ...committed {self.inserted} factors ({rows_done} country rows)...")
+
+    def finish(self) -> int:
+        if self.pending:
+            self._write()
+        checkpoint_path(self.xlsx_path).unlink(missing_ok=True)
+        return self.inserted
+
+    def _write(self) -> None:
+        start = time.perf_counter()
+        write_batch(self.pending)
+        self.seconds += time.perf_counter() - start
+        self.inserted += len(self.pending)
+        self.pending = []
 
-    new_factors_to_insert = []
+def seed_ceda_factors(xlsx_path: Path) -> None:
+    # Parsed once per workbook hash; later runs memory-map the compiled arrays
+    snapshot = load_snapshot(xlsx_path)
+    print(f"Loaded snapshot {snapshot.sha256[:12]}: {len(snapshot.country_names)} countries x {len(snapshot.sector_codes)} sectors.")
 
     # Open a brief session just to grab existing data and categories
     with Session(engine) as session:
@@ -109,65 +165,24 @@ def seed_ceda_factors(xlsx_path: Path) -> None:
         
         print("Downloading existing database index to memory (preventing duplicates)...")
         # Grab only the identifiers to keep memory usage tiny
-        existing_tuples = session.query(EmissionFactor.external_id, EmissionFactor.geography).all()
-        existing_set = set(existing_tuples) # O(1) lookup speed
+        existing_set = set(session.query(EmissionFactor.external_id, EmissionFactor.geography).all())
 
-    print("Building global carbon matrix in memory...")
-    for row in data_rows:
-        country_name = str(row[1]).strip() 
-        
-        if not country_name or country_name.lower() in ["country", "geography", ""]:
-            continue
-            
-        for col_idx in range(len(row)):
-            if col_idx >= len(codes_row):
-                continue
-                
-            code = codes_row[col_idx].strip()
-            
-            if not code or code.lower() in ["country code", "country", "country ", "geography"]:
-                continue
-                
-            base_ef = parse_decimal(row[col_idx])
-            multiplier = conversions.get(code)
-            
-            if not base_ef or not multiplier:
-                continue
-
-            final_ef = base_ef * multiplier
-            ext_id = format_external_id(code)
-
-            # INSTANT Memory Check instead of slow Database Query
-            if (ext_id, country_name) not in existing_set:
-                sector_name = category_map.get(code, f"Sector {code}")
-                
-                new_factors_to_insert.append(EmissionFactor(
-                    external_id=ext_id, provider=PROVIDER, name=f"{sector_name} ({code})",
-                    geography=country_name, year=YEAR, unit_of_measure=UNIT_OF_MEASURE,
-                    co2e_per_unit=final_ef, scope_3_intensity=final_ef,
-                    owner_id=sys_user_id, version=VERSION,
-                    methodology=f"Open CEDA 2025 Global Factors - {country_name}"
-                ))
-                # Add to set so we don't accidentally queue duplicates if the Excel file has them
-                existing_set.add((ext_id, country_name))
-
-    print(f"Prepared {len(new_factors_to_insert)} new global factors. Blasting to database...")
-
-    # Open fresh sessions to bulk save blocks of data, preventing connection timeouts
-    batch_size = 5000
-    inserted_count = 0
-    
-    for i in range(0, len(new_factors_to_insert), batch_size):
-        batch = new_factors_to_insert[i:i + batch_size]
-        # Using a fresh session for each batch ensures the connection stays alive
-        with Session(engine) as session:
-            session.add_all(batch)
-            session.commit()
-            inserted_count += len(batch)
-            print(f"   ...successfully committed {inserted_count} / {len(new_factors_to_insert)}...")
+    writer = CheckpointedFactorWriter(xlsx_path, snapshot.sha256)
+    if writer.rows_done:
+        print(f"Resuming from checkpoint: skipping {writer.rows_done} committed country rows.")
+
+    print("Streaming global carbon matrix to the database...")
+    for country_idx in range(writer.rows_done, len(snapshot.country_names)):
+        writer.add_country(
+            iter_factor_rows(snapshot, country_idx, category_map, existing_set, sys_user_id),
+            country_idx + 1
+        )
+
+    inserted_count = writer.finish()
+    publish_factor_store(sessionmaker(bind=engine))
 
     print(f"Master seed complete! {inserted_count} Global Open CEDA factors added.")
 
 if __name__ == "__main__":
     default_xlsx = Path(__file__).resolve().parent.parent.parent / "data" / "Open CEDA 2025.xlsx"
-    seed_ceda_factors(default_xlsx)
\ No newline at end of file
+    seed_ceda_factors(default_xlsx)
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models.user import User
+
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 10000))
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", 60))
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Detached, read-only copy of the user fields request handlers rely on."""
+    id: uuid.UUID
+    email: str
+    full_name: str | None
+    picture: str | None
+    provider: str
+    is_active: bool
+    is_admin: bool
+    created_at: datetime | None
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            picture=user.picture,
+            provider=user.provider,
+            is_active=user.is_active,
+            is_admin=user.is_admin,
+            created_at=user.created_at
+        )
+
+
+class TokenUserCache:
+    """
+    Bounded LRU of access token -> UserSnapshot with a per-entry TTL.
+
+    Entries never outlive the token's own expiry. Changes to a user made in
+    this process evict that user's entries immediately; other worker
+    processes pick them up within the TTL.
+    """
+
+    def __init__(self, maxsize: int = AUTH_CACHE_SIZE, ttl: float = AUTH_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> UserSnapshot | None:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token: str, snapshot: UserSnapshot, token_exp: float | None = None) -> None:
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        ttl = self.ttl
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (snapshot, time.monotonic() + ttl)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id) -> None:
+        with self._lock:
+            for token in [t for t, (snapshot, _) in self._entries.items() if snapshot.id == user_id]:
+                del self._entries[token]
+
+    def invalidate_all(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+token_user_cache = TokenUserCache()
+
+
+@event.listens_for(User, "after_update")
+def _evict_updated_user(mapper, connection, target):
+    # Covers deactivation, admin changes and email changes alike
+    token_user_cache.invalidate_user(target.id)
+
+
+@event.listens_for(User, "after_delete")
+def _evict_deleted_user(mapper, connection, target):
+    token_user_cache.invalidate_user(target.id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _evict_on_bulk_user_change(orm_execute_state):
+    # Query.update()/delete() on users bypass the mapper events above
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and \
+            orm_execute_state.bind_mapper is not None and orm_execute_state.bind_mapper.class_ is User:
+        token_user_cache.invalidate_all()
@@ -0,0 +1,233 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import openpyxl
+
+DEFAULT_SNAPSHOT_DIR = Path(__file__).resolve().parent.parent.parent / "data" / ".ceda_snapshots"
+SNAPSHOT_DIR = Path(os.getenv("CEDA_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR))
+
+# Header cells on the Raw sheet that are labels, not sector codes
+LABEL_COLUMNS = {"country code", "country", "geography"}
+
+ARRAYS = ("sector_codes", "multipliers", "country_codes", "country_names", "matrix")
+
+
+@dataclass
+class CedaSnapshot:
+    """
+    Columnar view of an Open CEDA workbook.
+
+    matrix[i, j] is the raw factor for country i and sector j (NaN when blank);
+    multipliers[j] is the purchaser-producer conversion for sector j.
+    """
+    sha256: str
+    sector_codes: np.ndarray
+    multipliers: np.ndarray
+    country_codes: np.ndarray
+    country_names: np.ndarray
+    matrix: np.ndarray
+
+
+def parse_decimal(value: object) -> Decimal | None:
+    if value is None: return None
+    text = str(value).strip()
+    if not text or text.lower() in {"na", "n/a", "nan", "null"}: return None
+    cleaned = text.replace(",", "")
+    if cleaned.startswith("(") and cleaned.endswith(")"): cleaned = f"-{cleaned[1:-1]}"
+    try:
+        return Decimal(cleaned)
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def parse_float(value: object) -> float:
+    parsed = parse_decimal(value)
+    return float(parsed) if parsed is not None else np.nan
+
+
+def workbook_sha256(xlsx_path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(xlsx_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_conversions(wb) -> dict:
+    sheet_conv = next((s for s in wb.sheetnames if "conversion" in s.lower()), None)
+    ws_conv = wb[sheet_conv]
+    
+    code_row = []
+    mult_row = []
+    
+    for row in ws_conv.iter_rows(values_only=True):
+        row_strs = [str(c).strip() if c is not None else "" for c in row]
+        row_lower = [x.lower() for x in row_strs]
+        
+        if any("1111a0" in x for x in row_lower):
+            code_row = row_strs
+        elif any("purchaser" in x and "producer" in x for x in row_lower) and len([x for x in row_strs if x]) > 5:
+            mult_row = row_strs
+            
+        if code_row and mult_row:
+            break
+            
+    conversions = {}
+    for code, mult_val in zip(code_row, mult_row):
+        code_str = code.strip()
+        if not code_str or code_str.lower() in ["sector name", "sector code", "purchaser - producer conversion", "source"]:
+            continue
+            
+        mult = parse_decimal(mult_val)
+        if mult:
+            conversions[code_str] = mult
+
+    return conversions
+
+
+def iter_raw_rows(wb) -> Iterator[tuple[list, tuple]]:
+    """Stream (sector codes header, country row) pairs from the Raw sheet without buffering it."""
+    sheet_raw = next((s for s in wb.sheetnames if "raw" in s.lower()), None)
+    ws_raw = wb[sheet_raw]
+
+    codes_row = None
+    for row in ws_raw.iter_rows(values_only=True):
+        if codes_row is None:
+            row_lower = [str(c).strip().lower() if c is not None else "" for c in row]
+            if any("1111a0" in x for x in row_lower):
+                codes_row = [str(c).strip() if c is not None else "" for c in row]
+        elif any(c is not None and str(c).strip() for c in row):
+            yield codes_row, row
+
+
+def sector_multipliers(sector_codes, conversions: dict) -> list[float]:
+    """Conversion multipliers aligned with the Raw sheet's sector columns (NaN when missing)."""
+    return [float(conversions[code]) if code in conversions else np.nan for code in sector_codes]
+
+
+def iter_raw_sheet(wb) -> Iterator[tuple]:
+    """
+    Stream the Raw sheet alone: ("sectors", sector codes) once, then
+    ("country", country code, country name, raw factors) per country row.
+    """
+    sector_cols = None
+    for codes_row, row in iter_raw_rows(wb):
+        if sector_cols is None:
+            sector_cols = [
+                (idx, code) for idx, code in enumerate(codes_row)
+                if code and code.lower().strip() not in LABEL_COLUMNS
+            ]
+            yield "sectors", [code for _, code in sector_cols]
+
+        country_name = str(row[1]).strip() if len(row) > 1 and row[1] is not None else ""
+        if not country_name or country_name.lower() in ["country", "geography", ""]:
+            continue
+
+        yield (
+            "country",
+            str(row[0]).strip() if row[0] is not None else "",
+            country_name,
+            [parse_float(row[idx]) if idx < len(row) else np.nan for idx, _ in sector_cols]
+        )
+
+
+def iter_workbook(xlsx_path: Path) -> Iterator[tuple]:
+    """
+    Stream the Conversion and Raw sheets (the slow openpyxl pass).
+
+    Yields ("sectors", sector codes, multipliers) once, then
+    ("country", country code, country name, raw factors) per country row.
+    """
+    wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
+    try:
+        conversions = read_conversions(wb)
+        for item in iter_raw_sheet(wb):
+            if item[0] == "sectors":
+                yield "sectors", item[1], sector_multipliers(item[1], conversions)
+            else:
+                yield item
+    finally:
+        wb.close()
+
+
+def build_snapshot(sha256: str, items) -> CedaSnapshot:
+    """Assemble the arrays from iter_workbook() items."""
+    sector_codes, multipliers = [], []
+    country_codes, country_names, matrix_rows = [], [], []
+
+    for item in items:
+        if item[0] == "sectors":
+            _, sector_codes, multipliers = item
+        else:
+            _, country_code, country_name, values = item
+            country_codes.append(country_code)
+            country_names.append(country_name)
+            matrix_rows.append(values)
+
+    return CedaSnapshot(
+        sha256=sha256,
+        sector_codes=np.array(sector_codes, dtype=str),
+        multipliers=np.array(multipliers, dtype=np.float64),
+        country_codes=np.array(country_codes, dtype=str),
+        country_names=np.array(country_names, dtype=str),
+        matrix=np.array(matrix_rows, dtype=np.float64).reshape(len(matrix_rows), len(sector_codes)),
+    )
+
+
+def parse_workbook(xlsx_path: Path, sha256: str) -> CedaSnapshot:
+    return build_snapshot(sha256, iter_workbook(xlsx_path))
+
+
+def snapshot_path(sha256: str, snapshot_dir: Path = None) -> Path:
+    return Path(snapshot_dir or SNAPSHOT_DIR) / sha256
+
+
+def compile_snapshot(xlsx_path: Path, snapshot_dir: Path = None) -> Path:
+    """Parse the workbook and write its snapshot under <snapshot_dir>/<sha256>/."""
+    sha256 = workbook_sha256(xlsx_path)
+    target = snapshot_path(sha256, snapshot_dir)
+    if target.exists():
+        return target
+
+    return write_snapshot(parse_workbook(xlsx_path, sha256), snapshot_dir)
+
+
+def write_snapshot(snapshot: CedaSnapshot, snapshot_dir: Path = None) -> Path:
+    snapshot_dir = Path(snapshot_dir or SNAPSHOT_DIR)
+    target = snapshot_dir / snapshot.sha256
+
+    # Write to a scratch directory and rename, so readers never see half a snapshot
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    scratch = Path(tempfile.mkdtemp(dir=snapshot_dir, prefix=".compiling-"))
+    try:
+        for name in ARRAYS:
+            np.save(scratch / f"{name}.npy", getattr(snapshot, name), allow_pickle=False)
+        os.replace(scratch, target)
+    except OSError:
+        # Another process finished the same snapshot first
+        shutil.rmtree(scratch, ignore_errors=True)
+        if not target.exists():
+            raise
+    return target
+
+
+def read_snapshot(path: Path) -> CedaSnapshot:
+    """Open a compiled snapshot; arrays are memory-mapped, not read into memory."""
+    path = Path(path)
+    arrays = {
+        name: np.load(path / f"{name}.npy", mmap_mode="r", allow_pickle=False)
+        for name in ARRAYS
+    }
+    return CedaSnapshot(sha256=path.name, **arrays)
+
+
+def load_snapshot(xlsx_path: Path, snapshot_dir: Path = None) -> CedaSnapshot:
+    """Return the snapshot for this exact workbook, compiling it on first use."""
+    return read_snapshot(compile_snapshot(xlsx_path, snapshot_dir))
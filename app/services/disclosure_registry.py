@@ -0,0 +1,298 @@
+import csv
+import io
+import re
+import uuid
+from decimal import Decimal, InvalidOperation
+from typing import Iterable
+
+from openpyxl import load_workbook
+from sqlalchemy import case, insert, or_, update
+from sqlalchemy.orm import Session
+
+from app.models.emission_factors import EmissionFactor
+from app.models.supplier_disclosure import SupplierDisclosure
+from app.services.factor_store import bump_factor_version
+
+IMPORT_CHUNK = 5000
+
+PROVIDER = "Verified Supplier Disclosure"
+METHODOLOGY = "Direct corporate disclosure override"
+
+REQUIRED_FIELDS = ["company_name", "reporting_year", "revenue_usd"]
+NUMERIC_FIELDS = [
+    "revenue_usd",
+    "scope_1_tco2e",
+    "scope_2_market_tco2e",
+    "scope_2_location_tco2e",
+    "scope_3_total_tco2e",
+]
+
+_WHITESPACE = re.compile(r"\s+")
+_SCHEME = re.compile(r"^[a-z][a-z0-9+.-]*://")
+
+
+def normalize_domain(value: str | None) -> str | None:
+    """Lookup key for a company domain: lowercased host without scheme, www. or path."""
+    if not value:
+        return None
+    key = _SCHEME.sub("", str(value).strip().lower())
+    key = key.split("/", 1)[0].removeprefix("www.")
+    return key or None
+
+
+def normalize_company_name(value: str | None) -> str | None:
+    """Lookup key for a company name: trimmed, lowercased, inner whitespace collapsed."""
+    if not value:
+        return None
+    key = _WHITESPACE.sub(" ", str(value)).strip().lower()
+    return key or None
+
+
+def read_disclosure_file(filename: str, content: bytes) -> list[tuple[int, dict]]:
+    """
+    Rows of a CSV or XLSX disclosure file as (row number, {header: value})
+    pairs. Blank rows are skipped; row numbers are those of the source file,
+    so import errors point at the right line.
+    """
+    if filename.lower().endswith(".csv"):
+        try:
+            text = content.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise ValueError("Invalid file encoding. Please upload a UTF-8 CSV.")
+        reader = csv.reader(io.StringIO(text))
+        header = next(reader, [])
+        rows = []
+        # A quoted field can span lines, so a record starts after the previous one ends
+        start = reader.line_num + 1
+        for row in reader:
+            if row:
+                rows.append((start, dict(zip(header, row))))
+            start = reader.line_num + 1
+        return rows
+
+    if filename.lower().endswith(".xlsx"):
+        wb = load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+        try:
+            rows = wb.worksheets[0].iter_rows(values_only=True)
+            header = [str(cell).strip() if cell is not None else "" for cell in next(rows, [])]
+            return [
+                (row_number, dict(zip(header, row)))
+                for row_number, row in enumerate(rows, start=2)
+                if any(cell is not None for cell in row)
+            ]
+        finally:
+            wb.close()
+
+    raise ValueError("Only CSV or XLSX files are permitted.")
+
+
+def parse_disclosure_row(row: dict) -> dict:
+    """Validated column values for one disclosure row; raises ValueError on bad input."""
+    def clean(field):
+        value = row.get(field)
+        if isinstance(value, str):
+            value = value.strip()
+        return value if value not in (None, "") else None
+
+    values = {field: clean(field) for field in REQUIRED_FIELDS + NUMERIC_FIELDS}
+    for field in REQUIRED_FIELDS:
+        if values[field] is None:
+            raise ValueError(f"Missing {field}.")
+
+    for field in NUMERIC_FIELDS:
+        if values[field] is not None:
+            try:
+                values[field] = Decimal(str(values[field]).replace(",", ""))
+            except InvalidOperation:
+                raise ValueError(f"Field '{field}' is not a number.")
+            # "nan"/"inf" parse, but cannot be compared or stored
+            if not values[field].is_finite():
+                raise ValueError(f"Field '{field}' is not a finite number.")
+
+    try:
+        values["reporting_year"] = int(values["reporting_year"])
+    except (TypeError, ValueError):
+        # e.g. an XLSX cell formatted as a date
+        raise ValueError("Field 'reporting_year' is not a year.")
+
+    if values["revenue_usd"] <= 0:
+        raise ValueError("Field 'revenue_usd' must be positive.")
+
+    values["company_name"] = str(values["company_name"])
+    values["domain"] = clean("domain")
+    values["assurance_level"] = clean("assurance_level")
+    values["source_url"] = clean("source_url")
+    values["domain_key"] = normalize_domain(values["domain"])
+    values["name_key"] = normalize_company_name(values["company_name"])
+    values.update(compute_intensities(values))
+    return values
+
+
+def compute_intensities(values: dict) -> dict:
+    """Revenue intensities (tCO2e per USD); market-based scope 2 is preferred."""
+    revenue = values["revenue_usd"]
+    scope_1 = values.get("scope_1_tco2e") or Decimal(0)
+    scope_2 = values.get("scope_2_market_tco2e")
+    if scope_2 is None:
+        scope_2 = values.get("scope_2_location_tco2e")
+    scope_2 = scope_2 or Decimal(0)
+    scope_3 = values.get("scope_3_total_tco2e") or Decimal(0)
+
+    return {
+        "co2e_intensity": (scope_1 + scope_2 + scope_3) / revenue,
+        "scope_1_intensity": scope_1 / revenue,
+        "scope_2_intensity": scope_2 / revenue,
+        "scope_3_intensity": scope_3 / revenue,
+    }
+
+
+def _factor_values(disclosure: dict, owner_id) -> dict:
+    return {
+        "external_id": None,
+        "provider": PROVIDER,
+        "name": disclosure["company_name"],
+        "geography": "Global",
+        "year": disclosure["reporting_year"],
+        "unit_of_measure": "USD",
+        "co2e_per_unit": disclosure["co2e_intensity"],
+        "scope_1_intensity": disclosure["scope_1_intensity"],
+        "scope_2_intensity": disclosure["scope_2_intensity"],
+        "scope_3_intensity": disclosure["scope_3_intensity"],
+        "source_url": disclosure["source_url"],
+        "methodology": METHODOLOGY,
+        "version": "1.0",
+        "owner_id": owner_id,
+    }
+
+
+def import_disclosures(db: Session, rows: Iterable[tuple[int, dict]], owner_id) -> dict:
+    """
+    Upserts disclosures into the registry, keyed by (name_key, reporting_year).
+
+    Each disclosure gets a synthetic emission factor carrying its
+    intensities, owned by the importing user. Rows are written in chunks
+    with bulk inserts and updates.
+    """
+    errors = []
+    parsed = {}
+    for row_number, row in rows:
+        try:
+            values = parse_disclosure_row(row)
+        except ValueError as e:
+            errors.append(f"Row {row_number}: {e}")
+            continue
+        # Later rows for the same company and year win
+        parsed[(values["name_key"], values["reporting_year"])] = values
+
+    report = {"inserted": 0, "updated": 0, "error_count": len(errors), "errors": errors[:50]}
+    keys = list(parsed)
+
+    for i in range(0, len(keys), IMPORT_CHUNK):
+        chunk = keys[i:i + IMPORT_CHUNK]
+        existing = {
+            (name_key, year): (disclosure_id, factor_id)
+            for disclosure_id, name_key, year, factor_id in db.query(
+                SupplierDisclosure.id,
+                SupplierDisclosure.name_key,
+                SupplierDisclosure.reporting_year,
+                SupplierDisclosure.emission_factor_id
+            ).filter(SupplierDisclosure.name_key.in_({name_key for name_key, _ in chunk}))
+        }
+
+        new_factors, factor_updates = [], []
+        new_disclosures, disclosure_updates = [], []
+        for key in chunk:
+            values = parsed[key]
+            disclosure_id, factor_id = existing.get(key, (None, None))
+
+            if factor_id:
+                factor_updates.append({"id": factor_id, **_factor_values(values, owner_id)})
+            else:
+                factor_id = uuid.uuid4()
+                new_factors.append({"id": factor_id, **_factor_values(values, owner_id)})
+
+            if disclosure_id:
+                disclosure_updates.append({"id": disclosure_id, "emission_factor_id": factor_id, **values})
+            else:
+                new_disclosures.append({
+                    "id": uuid.uuid4(), "emission_factor_id": factor_id, "owner_id": owner_id, **values
+                })
+
+        if new_factors:
+            db.execute(insert(EmissionFactor), new_factors)
+        if factor_updates:
+            db.execute(update(EmissionFactor), factor_updates)
+        if new_disclosures:
+            db.execute(insert(SupplierDisclosure), new_disclosures)
+        if disclosure_updates:
+            db.execute(update(SupplierDisclosure), disclosure_updates)
+        db.commit()
+
+        report["inserted"] += len(new_disclosures)
+        report["updated"] += len(disclosure_updates)
+
+    if keys:
+        bump_factor_version(db)
+
+    return report
+
+
+def _match_condition(domain_keys, name_keys):
+    conditions = []
+    if domain_keys:
+        conditions.append(SupplierDisclosure.domain_key.in_(domain_keys))
+    if name_keys:
+        conditions.append(SupplierDisclosure.name_key.in_(name_keys))
+    return or_(*conditions)
+
+
+def find_disclosure(db: Session, domain: str | None, company_name: str | None) -> SupplierDisclosure | None:
+    """Latest registry disclosure for a company, matching the domain before the name."""
+    domain_key = normalize_domain(domain)
+    name_key = normalize_company_name(company_name)
+    if not domain_key and not name_key:
+        return None
+
+    return db.query(SupplierDisclosure).filter(
+        _match_condition([domain_key] if domain_key else [], [name_key] if name_key else []),
+        SupplierDisclosure.emission_factor_id.is_not(None)
+    ).order_by(
+        case((SupplierDisclosure.domain_key == domain_key, 0), else_=1),
+        SupplierDisclosure.reporting_year.desc()
+    ).first()
+
+
+def match_disclosure_factors(db: Session, companies: Iterable[tuple[str | None, str | None]]) -> dict:
+    """
+    Bulk variant of find_disclosure: maps each (domain, company_name) pair
+    that has a registry disclosure to its emission factor id, in one query.
+    """
+    companies = list(companies)
+    domain_keys = {key for domain, _ in companies if (key := normalize_domain(domain))}
+    name_keys = {key for _, name in companies if (key := normalize_company_name(name))}
+    if not domain_keys and not name_keys:
+        return {}
+
+    by_domain, by_name = {}, {}
+    rows = db.query(
+        SupplierDisclosure.domain_key,
+        SupplierDisclosure.name_key,
+        SupplierDisclosure.emission_factor_id
+    ).filter(
+        _match_condition(domain_keys, name_keys),
+        SupplierDisclosure.emission_factor_id.is_not(None)
+    ).order_by(SupplierDisclosure.reporting_year)
+
+    # Ascending years, so the latest disclosure overwrites earlier ones
+    for domain_key, name_key, factor_id in rows:
+        if domain_key in domain_keys:
+            by_domain[domain_key] = factor_id
+        if name_key in name_keys:
+            by_name[name_key] = factor_id
+
+    matches = {}
+    for domain, name in companies:
+        factor_id = by_domain.get(normalize_domain(domain)) or by_name.get(normalize_company_name(name))
+        if factor_id:
+            matches[(domain, name)] = factor_id
+    return matches
@@ -1,11 +1,48 @@
+from collections import Counter, defaultdict
 from datetime import datetime
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session
 from app.models.spend import SpendRecord
 from app.models.supplier import Supplier
 from app.models.emission_factors import EmissionFactor
 from decimal import Decimal, InvalidOperation
 from app.models.category_factor_mapping import CategoryFactorMapping
-from app.services.tree_rollup import get_effective_factor
+from app.services.tree_rollup import get_effective_factors
+from app.services.geography import normalize_geography, FALLBACK_GEO_KEYS
+from app.services.factor_store import catalogue_owners, get_factor_store
+from app.services.metrics import record_calculation
+
+LOOKUP_CHUNK = 5000
+
+
+def _chunks(values, size=LOOKUP_CHUNK):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _target_external_id(category_code, mappings):
+    # 3a. A custom mapping from the Resolution Center wins
+    mapping = mappings.get(str(category_code).lower())
+    if mapping:
+        return mapping.emission_factor_id
+    # 3b. Auto-Match: If no manual mapping exists, assume the category code IS a direct CEDA code
+    clean_code = str(category_code).strip().upper()
+    return f"OPEN-CEDA-2025-{clean_code}"
+
+
+def _load_ceda_factors(db: Session, external_ids, geo_keys) -> dict:
+    """{(external_id, geo_key): factor} for the database path when the factor store is off."""
+    factors = {}
+    for chunk in _chunks(external_ids):
+        for factor in db.query(EmissionFactor).filter(
+            EmissionFactor.provider == "Open CEDA",
+            EmissionFactor.owner_id.in_(catalogue_owners()),
+            EmissionFactor.external_id.in_(chunk),
+            EmissionFactor.geo_key.in_(geo_keys)
+        ):
+            factors.setdefault((factor.external_id, factor.geo_key), factor)
+    return factors
 
 
 def calculate_emissions(db: Session):
@@ -15,17 +52,54 @@ def calculate_emissions(db: Session):
         1. Corporate Tree / Supplier-level factor
         2. Existing manual factor on record
         3. Category-based factor (CEDA Fallback & Direct Match)
+
+    Suppliers, tree factors, manual factors, mappings and CEDA factors are
+    loaded up front and results are written back with bulk UPDATEs, so the
+    statement count does not grow with the number of records.
     """
     uncalculated_records = db.query(SpendRecord).filter(
         SpendRecord.calculated_co2e == None
     ).all()
 
+    # Shared in-memory CEDA factors; None means fall back to database lookups
+    store = get_factor_store(db) if uncalculated_records else None
+
     updated = 0
+    outcomes = Counter()
+    changes = []
+
+    supplier_ids = {record.supplier_id for record in uncalculated_records}
+    suppliers = {}
+    for chunk in _chunks(supplier_ids):
+        suppliers.update((s.id, s) for s in db.query(Supplier).filter(Supplier.id.in_(chunk)))
+
+    tree_factors = get_effective_factors(db, supplier_ids)
+
+    manual_ids = {record.factor_used_id for record in uncalculated_records if record.factor_used_id}
+    manual_factors = {}
+    for chunk in _chunks(manual_ids):
+        manual_factors.update((f.id, f) for f in db.query(EmissionFactor).filter(EmissionFactor.id.in_(chunk)))
+
+    category_keys = {str(record.category_code).lower() for record in uncalculated_records if record.category_code}
+    # Case-insensitive equality; "_" and "%" in a category code are literal, not LIKE wildcards
+    mappings = {}
+    for chunk in _chunks(category_keys):
+        for mapping in db.query(CategoryFactorMapping).filter(
+            func.lower(CategoryFactorMapping.category_id).in_(chunk),
+            CategoryFactorMapping.is_active == True
+        ):
+            mappings.setdefault(mapping.category_id.lower(), mapping)
+
+    ceda_factors = {}
+    if not store and category_keys:
+        ceda_factors = _load_ceda_factors(
+            db,
+            {str(_target_external_id(code, mappings)) for code in category_keys},
+            {normalize_geography(s.region) for s in suppliers.values() if s.region} - {None} | set(FALLBACK_GEO_KEYS)
+        )
 
     for record in uncalculated_records:
-        supplier = db.query(Supplier).filter(
-            Supplier.id == record.supplier_id
-        ).first()
+        supplier = suppliers.get(record.supplier_id)
 
         if not supplier:
             continue
@@ -34,7 +108,7 @@ def calculate_emissions(db: Session):
         method = "Unknown"
 
         # Priority 1: Corporate Tree Cascade
-        tree_factor = get_effective_factor(db, supplier.id)
+        tree_factor = tree_factors.get(supplier.id)
         if tree_factor:
             factor = tree_factor
             if supplier.resolved_factor_id == factor.id:
@@ -44,57 +118,48 @@ def calculate_emissions(db: Session):
 
         # Priority 2: Manual Override
         if not factor and record.factor_used_id:
-            factor = db.query(EmissionFactor).filter(
-                EmissionFactor.id == record.factor_used_id
-            ).first()
+            factor = manual_factors.get(record.factor_used_id)
             if factor:
                 method = "Manual_Override"
 
         # Priority 3: Category Mapping or Direct CEDA Match
         if not factor and record.category_code:
-            target_ext_id = None
-            
-            # 3a. Check if a custom mapping exists in the Resolution Center
-            mapping = db.query(CategoryFactorMapping).filter(
-                CategoryFactorMapping.category_id.ilike(record.category_code),
-                CategoryFactorMapping.is_active == True
-            ).first()
-
-            if mapping:
-                target_ext_id = mapping.emission_factor_id
-            else:
-                # 3b. Auto-Match: If no manual mapping exists, assume the category code IS a direct CEDA code
-                clean_code = str(record.category_code).strip().upper()
-                target_ext_id = f"OPEN-CEDA-2025-{clean_code}"
+            target_ext_id = _target_external_id(record.category_code, mappings)
 
             # Now that we have the target ID, fetch the country multiplier
             if target_ext_id:
                 # Try to match the exact region of the supplier
-                if supplier.region:
-                    factor = db.query(EmissionFactor).filter(
-                        EmissionFactor.provider == "Open CEDA",
-                        EmissionFactor.external_id == target_ext_id,
-                        EmissionFactor.geography.ilike(supplier.region) 
-                    ).first()
+                region_key = normalize_geography(supplier.region)
+                if region_key:
+                    if store:
+                        factor = store.get(target_ext_id, region_key)
+                    else:
+                        factor = ceda_factors.get((str(target_ext_id), region_key))
                     
                     if factor:
                         method = f"CEDA_{supplier.region}_Specific"
 
-                # Fallback: Try 'Global' or 'US' if exact country match fails
+                # Fallback: Try 'US', 'Rest of World' or 'Global' if exact country match fails
                 if not factor:
-                    factor = db.query(EmissionFactor).filter(
-                        EmissionFactor.provider == "Open CEDA",
-                        EmissionFactor.external_id == target_ext_id,
-                        EmissionFactor.geography.in_(["Global", "Rest of World", "RoW", "US"])
-                    ).order_by(EmissionFactor.geography.desc()).first()
+                    if store:
+                        factor = store.get_first(target_ext_id, FALLBACK_GEO_KEYS)
+                    else:
+                        factor = next(
+                            (ceda_factors[key] for key in ((str(target_ext_id), k) for k in FALLBACK_GEO_KEYS) if key in ceda_factors),
+                            None
+                        )
                     
                     if factor:
                         method = "CEDA_Global_Fallback"
 
         # Final Safety Check (Triggers Resolution Center)
         if not factor:
-            record.calculated_co2e = None
-            record.calculation_method = "Requires_Mapping"
+            changes.append({
+                "spend_id": record.spend_id,
+                "calculated_co2e": None,
+                "calculation_method": "Requires_Mapping"
+            })
+            outcomes["Requires_Mapping"] += 1
             continue
             
         try:
@@ -116,24 +181,36 @@ def calculate_emissions(db: Session):
 
             # Calculate Total CO2e
             intensity = Decimal(str(factor.co2e_per_unit))
-            record.calculated_co2e = base_value * intensity
+            change = {"spend_id": record.spend_id, "calculated_co2e": base_value * intensity}
             
             # Calculate Scope Breakdowns
             for scope in [1, 2, 3]:
                 field_name = f'scope_{scope}_intensity'
                 intensity_val = getattr(factor, field_name, None)
                 if intensity_val is not None:
-                    setattr(record, f'calculated_scope_{scope}', base_value * Decimal(str(intensity_val)))
+                    change[f'calculated_scope_{scope}'] = base_value * Decimal(str(intensity_val))
 
-            record.factor_used_id = factor.id
-            record.calculated_at = datetime.utcnow()
-            record.calculation_method = method
+            change["factor_used_id"] = factor.id
+            change["calculated_at"] = datetime.utcnow()
+            change["calculation_method"] = method
+            changes.append(change)
             
             updated += 1
+            outcomes[method] += 1
             
         except (ValueError, TypeError, InvalidOperation) as e:
-            print(f"Error calculating record {record.id}: {e}")
+            print(f"Error calculating record {record.spend_id}: {e}")
             continue
 
+    # Bulk UPDATE by primary key, one executemany per set of changed columns;
+    # rows are grouped first, as mixed column sets are split into runs
+    by_columns = defaultdict(list)
+    for change in changes:
+        by_columns[frozenset(change)].append(change)
+    for group in by_columns.values():
+        for chunk in _chunks(group):
+            db.execute(update(SpendRecord), chunk)
+
     db.commit()
-    return updated
\ No newline at end of file
+    record_calculation(outcomes)
+    return updated
@@ -7,19 +7,23 @@ from sqlalchemy.orm import Session
 from app.models.supplier import Supplier
 
 
+def load_supplier_map(db: Session, owner_id: uuid.UUID) -> dict[str, uuid.UUID]:
+    """{supplier_name: id} for an owner's suppliers, in one query."""
+    return {
+        supplier_name: supplier_id
+        for supplier_name, supplier_id in db.query(Supplier.supplier_name, Supplier.id).filter(
+            Supplier.owner_id == owner_id
+        )
+        if supplier_name
+    }
+
+
 def resolve_supplier(db: Session, raw_name: str, owner_id: uuid.UUID) -> dict[str, Any]:
-    suppliers = (
-        db.query(Supplier)
-        .filter(Supplier.owner_id == owner_id)
-        .all()
-    )
+    return match_supplier(raw_name, load_supplier_map(db, owner_id))
 
-    supplier_map = {
-        supplier.supplier_name: supplier.id
-        for supplier in suppliers
-        if supplier.supplier_name
-    }
 
+def match_supplier(raw_name: str, supplier_map: dict[str, uuid.UUID]) -> dict[str, Any]:
+    """resolve_supplier against a preloaded map, for resolving many names in one pass."""
     if not raw_name or not supplier_map:
         return {
             "match_found": False,
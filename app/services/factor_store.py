@@ -0,0 +1,293 @@
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from dataclasses import dataclass
+from decimal import Decimal
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models.emission_factors import EmissionFactor
+from app.models.factor_version import FactorVersion
+from app.models.user import User
+
+PROVIDER = "Open CEDA"
+STORE_DIR = Path(os.getenv("FACTOR_STORE_DIR", Path(tempfile.gettempdir()) / "scopeops_factor_store"))
+FACTOR_STORE_ENABLED = os.getenv("FACTOR_STORE_ENABLED", "true").lower() == "true"
+# Older builds stay on disk so workers still opening them never lose the files
+FACTOR_STORE_KEEP_VERSIONS = int(os.getenv("FACTOR_STORE_KEEP_VERSIONS", 3))
+
+# Version stamp names (rows of factor_versions)
+FACTORS = "factors"
+CEDA = "ceda"
+
+KEY_SEPARATOR = "\x1f"
+ARRAYS = ("keys", "ids", "values", "units", "geographies")
+
+
+def catalogue_owners():
+    """The seeded catalogue belongs to the system user; users' own "Open CEDA" factors stay private."""
+    return select(User.id).where(User.provider == "system")
+
+
+@dataclass(frozen=True)
+class StoredFactor:
+    """Read-only stand-in for an EmissionFactor row, as used by the calculator."""
+    id: uuid.UUID
+    external_id: str
+    geography: str
+    unit_of_measure: str
+    co2e_per_unit: Decimal
+    scope_1_intensity: Optional[Decimal]
+    scope_2_intensity: Optional[Decimal]
+    scope_3_intensity: Optional[Decimal]
+
+
+def _decimal(value: float) -> Optional[Decimal]:
+    return None if np.isnan(value) else Decimal(repr(float(value)))
+
+
+class FactorStore:
+    """
+    Array-backed CEDA factors, sorted by "external_id<US>geo_key".
+
+    Arrays are memory-mapped from disk, so every worker process on the host
+    shares the same physical pages through the OS page cache.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.version = self.path.name
+        for name in ARRAYS:
+            setattr(self, name, np.load(self.path / f"{name}.npy", mmap_mode="r", allow_pickle=False))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def get(self, external_id: str, geo_key: str) -> Optional[StoredFactor]:
+        if not external_id or not geo_key:
+            return None
+        key = f"{external_id}{KEY_SEPARATOR}{geo_key}"
+        idx = int(np.searchsorted(self.keys, key))
+        if idx >= len(self.keys) or self.keys[idx] != key:
+            return None
+
+        co2e, scope_1, scope_2, scope_3 = self.values[idx]
+        return StoredFactor(
+            id=uuid.UUID(bytes=bytes(self.ids[idx])),
+            external_id=external_id,
+            geography=str(self.geographies[idx]),
+            unit_of_measure=str(self.units[idx]),
+            co2e_per_unit=_decimal(co2e),
+            scope_1_intensity=_decimal(scope_1),
+            scope_2_intensity=_decimal(scope_2),
+            scope_3_intensity=_decimal(scope_3),
+        )
+
+    def get_first(self, external_id: str, geo_keys: list) -> Optional[StoredFactor]:
+        """First match in order of preference, e.g. the global fallback geographies."""
+        for geo_key in geo_keys:
+            factor = self.get(external_id, geo_key)
+            if factor:
+                return factor
+        return None
+
+
+def current_factor_version(db: Session, name: str = FACTORS) -> str:
+    return db.query(FactorVersion.version).filter(FactorVersion.name == name).scalar() or ""
+
+
+def bump_factor_version(db: Session, ceda: bool = False) -> str:
+    """
+    Invalidate cached factor data in every worker on every host; call after
+    factors are created or re-seeded. Pass ceda=True only when the seeded
+    Open CEDA catalogue changed, which retires the factor store. Commits.
+    """
+    version = uuid.uuid4().hex
+    names = [FACTORS, CEDA] if ceda else [FACTORS]
+    for attempt in range(2):
+        try:
+            for name in names:
+                stamp = db.get(FactorVersion, name)
+                if stamp:
+                    stamp.version = version
+                else:
+                    db.add(FactorVersion(name=name, version=version))
+            db.commit()
+            return version
+        except IntegrityError:
+            # Another process created the stamp first; update it instead
+            db.rollback()
+            if attempt:
+                raise
+    return version
+
+
+def build_factor_store(db: Session, path: Path) -> Path:
+    """Dump the CEDA factor table into sorted arrays under path (written atomically)."""
+    rows = db.query(
+        EmissionFactor.external_id,
+        EmissionFactor.geo_key,
+        EmissionFactor.id,
+        EmissionFactor.geography,
+        EmissionFactor.unit_of_measure,
+        EmissionFactor.co2e_per_unit,
+        EmissionFactor.scope_1_intensity,
+        EmissionFactor.scope_2_intensity,
+        EmissionFactor.scope_3_intensity
+    ).filter(
+        EmissionFactor.provider == PROVIDER,
+        EmissionFactor.owner_id.in_(catalogue_owners()),
+        EmissionFactor.external_id != None,
+        EmissionFactor.geo_key != None
+    ).all()
+
+    # Keep the first row per key, like the .first() lookups it replaces
+    by_key = {}
+    for row in rows:
+        by_key.setdefault(f"{row.external_id}{KEY_SEPARATOR}{row.geo_key}", row)
+
+    keys = sorted(by_key)
+    ordered = [by_key[k] for k in keys]
+
+    def as_float(value):
+        return np.nan if value is None else float(value)
+
+    arrays = {
+        "keys": np.array(keys, dtype=str),
+        "ids": np.array([list(r.id.bytes) for r in ordered], dtype=np.uint8).reshape(len(ordered), 16),
+        "values": np.array(
+            [[as_float(r.co2e_per_unit), as_float(r.scope_1_intensity),
+              as_float(r.scope_2_intensity), as_float(r.scope_3_intensity)] for r in ordered],
+            dtype=np.float64
+        ).reshape(len(ordered), 4),
+        "units": np.array([r.unit_of_measure for r in ordered], dtype=str),
+        "geographies": np.array([r.geography for r in ordered], dtype=str),
+    }
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    scratch = Path(tempfile.mkdtemp(dir=path.parent, prefix=".building-"))
+    try:
+        for name, array in arrays.items():
+            np.save(scratch / f"{name}.npy", array, allow_pickle=False)
+        os.replace(scratch, path)
+    except OSError:
+        # Another worker published the same version first
+        shutil.rmtree(scratch, ignore_errors=True)
+        if not path.exists():
+            raise
+    return path
+
+
+_lock = threading.Lock()
+_store: Optional[FactorStore] = None
+# Set by warm_factor_store; lets a worker build a missing version off the request path
+_session_factory = None
+_building: Optional[threading.Thread] = None
+
+
+def _open_store(version: str) -> Optional[FactorStore]:
+    try:
+        return FactorStore(STORE_DIR / version)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def get_factor_store(db: Session) -> Optional[FactorStore]:
+    """
+    The process-wide factor store for the current CEDA version stamp, or None
+    (callers fall back to database lookups) when disabled or when this host
+    has not built that version yet. Never builds in the request: a missing
+    version, e.g. one seeded from another host, is built by a background
+    thread and picked up by later requests.
+    """
+    global _store
+    if not FACTOR_STORE_ENABLED:
+        return None
+
+    version = current_factor_version(db, CEDA)
+    if not version:
+        return None
+    if _store is not None and _store.version == version:
+        return _store
+
+    with _lock:
+        if _store is None or _store.version != version:
+            store = _open_store(version)
+            if store is None:
+                _build_in_background()
+                return None
+            _store = store
+    return _store
+
+
+def _build_in_background() -> None:
+    global _building
+    if _session_factory is None or (_building is not None and _building.is_alive()):
+        return
+    _building = threading.Thread(
+        target=warm_factor_store, args=(_session_factory,), name="factor-store-build", daemon=True
+    )
+    _building.start()
+
+
+def prune_factor_store(keep: int = FACTOR_STORE_KEEP_VERSIONS, current: str = None) -> None:
+    """Remove all but the `keep` most recently built versions; the current one always stays."""
+    builds = sorted(
+        (entry for entry in STORE_DIR.iterdir() if entry.is_dir() and not entry.name.startswith(".")),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True
+    )
+    for entry in builds[keep:]:
+        if entry.name != current:
+            # Open memory maps in other workers stay valid after unlink on POSIX
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+def warm_factor_store(session_factory) -> Optional[FactorStore]:
+    """
+    Build the store for the current CEDA version on this host if it is
+    missing, then attach to it. Runs at worker startup and after seeding.
+    A database that is not migrated yet leaves the store off instead of
+    failing startup.
+    """
+    global _session_factory
+    if not FACTOR_STORE_ENABLED:
+        return None
+    _session_factory = session_factory
+    db = session_factory()
+    try:
+        version = current_factor_version(db, CEDA) or bump_factor_version(db, ceda=True)
+        path = STORE_DIR / version
+        if not path.exists():
+            # Written to a scratch directory and renamed into place
+            build_factor_store(db, path)
+            prune_factor_store(current=version)
+        return get_factor_store(db)
+    except (SQLAlchemyError, OSError) as e:
+        db.rollback()
+        print(f"Factor store not warmed, using database lookups: {e.__class__.__name__}: {e}")
+        return None
+    finally:
+        db.close()
+
+
+def publish_factor_store(session_factory) -> Optional[FactorStore]:
+    """
+    Stamp a new CEDA version and build it on this host; run by the seed
+    scripts after writing Open CEDA factors. Other hosts build it when their
+    workers next start and use database lookups until then.
+    """
+    db = session_factory()
+    try:
+        bump_factor_version(db, ceda=True)
+    finally:
+        db.close()
+    return warm_factor_store(session_factory)
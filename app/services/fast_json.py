@@ -0,0 +1,28 @@
+from decimal import Decimal
+from typing import Iterable, Sequence
+
+import orjson
+from fastapi.responses import Response
+
+
+def _default(value):
+    # Keep Decimal output identical to the Pydantic path (string, exact scale)
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(Response):
+    """
+    orjson-backed JSON response. UUIDs and datetimes are encoded natively,
+    Decimals are emitted as strings like the standard response models.
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_default)
+
+
+def rows_response(columns: Sequence[str], rows: Iterable[Sequence]) -> FastJSONResponse:
+    """Encode plain row tuples as a list of objects keyed by column name."""
+    return FastJSONResponse([dict(zip(columns, row)) for row in rows])
@@ -0,0 +1,17 @@
+import re
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Geographies tried when a supplier's own region has no factor, best first
+FALLBACK_GEO_KEYS = ["us", "row", "rest of world", "global"]
+
+
+def normalize_geography(value: str | None) -> str | None:
+    """
+    Canonical lookup key for a geography or supplier region:
+    trimmed, lowercased, inner whitespace collapsed.
+    """
+    if value is None:
+        return None
+    key = _WHITESPACE.sub(" ", str(value)).strip().lower()
+    return key or None
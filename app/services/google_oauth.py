@@ -0,0 +1,94 @@
+import os
+import time
+import httpx
+
+GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
+GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
+GOOGLE_REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI", "http://localhost:8000/auth/google/callback")
+
+# Overridable so tests and staging can point the flows at a local stub server
+GOOGLE_TOKEN_URL = os.getenv("GOOGLE_TOKEN_URL", "https://oauth2.googleapis.com/token")
+GOOGLE_USERINFO_URL = os.getenv("GOOGLE_USERINFO_URL", "https://www.googleapis.com/oauth2/v1/userinfo")
+
+GOOGLE_HTTP_TIMEOUT = float(os.getenv("GOOGLE_HTTP_TIMEOUT", 5))
+GOOGLE_HTTP_MAX_CONNECTIONS = int(os.getenv("GOOGLE_HTTP_MAX_CONNECTIONS", 20))
+GOOGLE_USERINFO_CACHE_TTL = float(os.getenv("GOOGLE_USERINFO_CACHE_TTL", 60))
+GOOGLE_USERINFO_CACHE_SIZE = 1024
+
+
+class GoogleOAuthUnavailable(Exception):
+    """Google did not answer within the timeout or the connection failed."""
+
+
+_client: httpx.AsyncClient | None = None
+_userinfo_cache: dict[str, tuple[dict, float]] = {}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared keep-alive client; created on first use and closed at shutdown."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(GOOGLE_HTTP_TIMEOUT, connect=min(GOOGLE_HTTP_TIMEOUT, 2.0)),
+            limits=httpx.Limits(
+                max_connections=GOOGLE_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=GOOGLE_HTTP_MAX_CONNECTIONS
+            )
+        )
+    return _client
+
+
+def set_http_client(client: httpx.AsyncClient | None) -> None:
+    """Swap the shared client, e.g. for one with a stub transport."""
+    global _client
+    _client = client
+    _userinfo_cache.clear()
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    _userinfo_cache.clear()
+
+
+async def exchange_code(code: str) -> dict | None:
+    """Token response for an authorization code, or None if Google rejects it."""
+    try:
+        res = await get_http_client().post(GOOGLE_TOKEN_URL, data={
+            "client_id": GOOGLE_CLIENT_ID,
+            "client_secret": GOOGLE_CLIENT_SECRET,
+            "code": code,
+            "grant_type": "authorization_code",
+            "redirect_uri": GOOGLE_REDIRECT_URI,
+        })
+    except httpx.HTTPError as e:
+        raise GoogleOAuthUnavailable(str(e))
+    return res.json() if res.status_code == 200 else None
+
+
+async def fetch_userinfo(access_token: str) -> dict | None:
+    """Userinfo for an access token, or None if Google rejects it. Answers are cached briefly."""
+    now = time.monotonic()
+    cached = _userinfo_cache.get(access_token)
+    if cached and cached[1] > now:
+        return cached[0]
+
+    try:
+        res = await get_http_client().get(
+            GOOGLE_USERINFO_URL,
+            params={"alt": "json"},
+            headers={"Authorization": f"Bearer {access_token}"}
+        )
+    except httpx.HTTPError as e:
+        raise GoogleOAuthUnavailable(str(e))
+    if res.status_code != 200:
+        return None
+
+    user_info = res.json()
+    if len(_userinfo_cache) >= GOOGLE_USERINFO_CACHE_SIZE:
+        for token in [t for t, (_, expires) in _userinfo_cache.items() if expires <= now] or [next(iter(_userinfo_cache))]:
+            del _userinfo_cache[token]
+    _userinfo_cache[access_token] = (user_info, now + GOOGLE_USERINFO_CACHE_TTL)
+    return user_info
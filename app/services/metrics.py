@@ -0,0 +1,206 @@
+import time
+from collections import Counter as Tally
+from contextvars import ContextVar
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import database
+from app.services.auth_cache import token_user_cache
+
+# Own registry, so /metrics only carries what this module defines. Values
+# are per process; with several workers, scrape each one or aggregate.
+registry = CollectorRegistry()
+
+REQUESTS = Counter(
+    "scopeops_http_requests_total", "HTTP requests by route template and status.",
+    ["method", "route", "status"], registry=registry
+)
+REQUEST_LATENCY = Histogram(
+    "scopeops_http_request_duration_seconds", "HTTP request latency by route template.",
+    ["method", "route"], registry=registry
+)
+REQUEST_SQL_STATEMENTS = Histogram(
+    "scopeops_http_request_sql_statements", "SQL statements issued while serving one request.",
+    ["method", "route"], buckets=(0, 1, 2, 5, 10, 20, 50, 100, 500, 1000), registry=registry
+)
+REQUEST_SQL_SECONDS = Histogram(
+    "scopeops_http_request_sql_duration_seconds", "Time spent in SQL while serving one request.",
+    ["method", "route"], registry=registry
+)
+SQL_STATEMENTS = Counter("scopeops_sql_statements_total", "SQL statements executed.", registry=registry)
+SQL_SECONDS = Counter("scopeops_sql_duration_seconds_total", "Time spent executing SQL.", registry=registry)
+
+CALCULATOR_RUNS = Counter("scopeops_calculator_runs_total", "Emission calculation runs.", registry=registry)
+CALCULATOR_PRICED = Counter(
+    "scopeops_calculator_records_priced_total", "Spend records priced, by calculation method.",
+    ["method"], registry=registry
+)
+CALCULATOR_FALLBACKS = Counter(
+    "scopeops_calculator_fallbacks_total", "Records priced with a Global/US/RoW fallback factor.",
+    registry=registry
+)
+CALCULATOR_REQUIRES_MAPPING = Counter(
+    "scopeops_calculator_requires_mapping_total", "Records left for the Resolution Center.",
+    registry=registry
+)
+
+FALLBACK_METHOD = "CEDA_Global_Fallback"
+REQUIRES_MAPPING_METHOD = "Requires_Mapping"
+# "method" label values; calculation methods outside this set are grouped
+METHOD_LABELS = {"Unknown", "Supplier_Locked", "Corporate_Tree_Cascade", "Manual_Override", FALLBACK_METHOD}
+REGION_METHOD_LABEL = "CEDA_Region_Specific"
+OTHER_METHOD_LABEL = "Other"
+
+
+# --- SQL statements per request ---
+class _SqlStats:
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+
+# Set by the middleware; threadpool handlers and async sessions share the context
+_request_sql: ContextVar[_SqlStats | None] = ContextVar("request_sql", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metrics_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    SQL_STATEMENTS.inc()
+    SQL_SECONDS.inc(elapsed)
+    stats = _request_sql.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += elapsed
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    conn = exception_context.connection
+    if conn is not None and not conn.closed:
+        starts = conn.info.get("metrics_query_start")
+        if starts:
+            starts.pop()
+
+
+# --- Gauges read at scrape time ---
+def _engines():
+    yield "sync", database.engine
+    if database._async_engine is not None:
+        yield "async", database._async_engine.sync_engine
+
+
+class _PoolCollector:
+    """Checked-out, checked-in and overflow connections of each engine's pool."""
+
+    def collect(self):
+        gauges = {
+            name: GaugeMetricFamily(f"scopeops_db_pool_{name}", f"Connection pool {name.replace('_', ' ')}.", labels=["engine"])
+            for name in ("size", "checked_out", "checked_in", "overflow")
+        }
+        for label, engine in _engines():
+            pool = engine.pool
+            # NullPool and StaticPool do not track these
+            for name, method in (("size", "size"), ("checked_out", "checkedout"),
+                                 ("checked_in", "checkedin"), ("overflow", "overflow")):
+                if hasattr(pool, method):
+                    value = getattr(pool, method)()
+                    # QueuePool reports overflow as negative until the pool is full
+                    gauges[name].add_metric([label], max(value, 0) if name == "overflow" else value)
+        yield from gauges.values()
+
+
+class _AuthCacheCollector:
+    """Hits, misses and size of the token -> user cache."""
+
+    def collect(self):
+        stats = token_user_cache.stats()
+        yield CounterMetricFamily("scopeops_auth_cache_hits", "Token cache hits.", value=stats["hits"])
+        yield CounterMetricFamily("scopeops_auth_cache_misses", "Token cache misses.", value=stats["misses"])
+        yield GaugeMetricFamily("scopeops_auth_cache_size", "Cached tokens.", value=stats["size"])
+        yield GaugeMetricFamily("scopeops_auth_cache_hit_rate", "Hit rate since start.", value=stats["hit_rate"])
+
+
+registry.register(_PoolCollector())
+registry.register(_AuthCacheCollector())
+
+
+def _method_label(method: str) -> str:
+    """CEDA_<region>_Specific carries the supplier's free-text region, so it is grouped."""
+    if method in METHOD_LABELS:
+        return method
+    if method.startswith("CEDA_") and method.endswith("_Specific"):
+        return REGION_METHOD_LABEL
+    return OTHER_METHOD_LABEL
+
+
+def record_calculation(methods: Tally) -> None:
+    """Counts one calculate_emissions run from its {calculation_method: records} tally."""
+    CALCULATOR_RUNS.inc()
+    for method, count in methods.items():
+        if method == REQUIRES_MAPPING_METHOD:
+            CALCULATOR_REQUIRES_MAPPING.inc(count)
+            continue
+        CALCULATOR_PRICED.labels(method=_method_label(method)).inc(count)
+        if method == FALLBACK_METHOD:
+            CALCULATOR_FALLBACKS.inc(count)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency, status and SQL work per route.
+
+    Routes are labelled by their path template (/suppliers/{supplier_id}),
+    never the raw path, to keep label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        stats = _SqlStats()
+        token = _request_sql.set(stats)
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_sql.reset(token)
+
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            REQUESTS.labels(method=method, route=route_label, status=str(status)).inc()
+            REQUEST_LATENCY.labels(method=method, route=route_label).observe(elapsed)
+            REQUEST_SQL_STATEMENTS.labels(method=method, route=route_label).observe(stats.statements)
+            REQUEST_SQL_SECONDS.labels(method=method, route=route_label).observe(stats.seconds)
@@ -1,6 +1,8 @@
 from rapidfuzz import process
+from sqlalchemy import exists
 from sqlalchemy.orm import Session
 from app.models.supplier import Supplier
+from app.models.supplier_closure import SupplierClosure
 from app.config.verified_suppliers import VERIFIED_SUPPLIERS
 
 
@@ -8,20 +10,59 @@ from app.config.verified_suppliers import VERIFIED_SUPPLIERS
 def creates_cycle(db: Session, child_id, parent_id) -> bool:
     """
     Returns True if assigning parent_id to child_id creates a cycle.
+
+    That is the case when parent_id already sits in child_id's subtree,
+    which is a single primary-key lookup in the closure table.
     """
-    current_parent = parent_id
+    if not parent_id or not child_id:
+        return False
+
+    if parent_id == child_id:
+        return True
+
+    return bool(db.query(
+        exists().where(
+            SupplierClosure.ancestor_id == child_id,
+            SupplierClosure.descendant_id == parent_id
+        )
+    ).scalar())
+
+
+def load_parent_map(db: Session, owner_id) -> dict:
+    """{supplier_id: parent_id} for all of an owner's suppliers, in one query."""
+    return dict(
+        db.query(Supplier.id, Supplier.parent_id).filter(Supplier.owner_id == owner_id).all()
+    )
 
-    while current_parent:
-        if current_parent == child_id:
-            return True
 
-        parent = db.query(Supplier).filter(
-            Supplier.id == current_parent
-        ).first()
+def find_cycles(parent_map: dict, edges) -> list:
+    """
+    Bulk variant of creates_cycle, evaluated in memory.
+
+    Applies every proposed (child_id, parent_id) edge to a copy of parent_map
+    and returns the proposed edges that end up on a cycle, in input order.
+    A parent_id of None detaches the child. Runs in O(len(parent_map) + len(edges)).
+    """
+    edges = list(edges)
+    parents = dict(parent_map)
+    for child_id, parent_id in edges:
+        parents[child_id] = parent_id
+
+    # Every node has at most one parent, so each walk either reaches a root,
+    # a node already finished, or a node on its own path (a cycle)
+    finished = set()
+    on_cycle = set()
+    for start in parents:
+        path = {}
+        node = start
+        while node is not None and node not in finished and node not in path:
+            path[node] = len(path)
+            node = parents.get(node)
 
-        if not parent:
-            break
+        if node is not None and node in path:
+            walk = list(path)
+            on_cycle.update(walk[path[node]:])
 
-        current_parent = parent.parent_id
+        finished.update(path)
 
-    return False
+    return [(child_id, parent_id) for child_id, parent_id in edges if child_id in on_cycle]
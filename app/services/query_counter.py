@@ -0,0 +1,45 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import database
+
+
+class QueryCounter:
+    """SQL statements sent to the database while a count_queries() block is active."""
+
+    def __init__(self):
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        # An executemany is one round trip, so it counts once
+        self.statements.append(statement)
+
+    def __repr__(self) -> str:
+        return f"<QueryCounter {self.count} statements>\n" + "\n".join(self.statements)
+
+
+@contextmanager
+def count_queries(*engines):
+    """
+    Counts statements on the given engines (default: the application engine).
+
+        with count_queries() as queries:
+            calculate_emissions(db)
+        assert queries.count <= 10, queries
+
+    Async engines are accepted and counted through their sync engine.
+    """
+    counter = QueryCounter()
+    targets = [getattr(engine, "sync_engine", engine) for engine in engines or (database.engine,)]
+    for target in targets:
+        event.listen(target, "before_cursor_execute", counter._record)
+    try:
+        yield counter
+    finally:
+        for target in targets:
+            event.remove(target, "before_cursor_execute", counter._record)
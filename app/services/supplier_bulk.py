@@ -0,0 +1,123 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import delete, insert, or_, update
+from sqlalchemy.orm import Session
+from app.models.supplier import Supplier
+from app.models.supplier_closure import SupplierClosure
+from app.services.parent_child_circular import find_cycles, load_parent_map
+from app.services.supplier_closure import rebuild_closure
+
+
+def _owned_ids(db: Session, owner_id, ids) -> set:
+    """Which of ids belong to owner_id, in one IN query."""
+    if not ids:
+        return set()
+    return {
+        supplier_id for (supplier_id,) in db.query(Supplier.id).filter(
+            Supplier.owner_id == owner_id,
+            Supplier.id.in_(ids)
+        )
+    }
+
+
+def bulk_create_suppliers(db: Session, rows: list[dict]) -> None:
+    """
+    Inserts new root suppliers with one executemany, plus their self rows in
+    the closure table, which bulk inserts do not get from the mapper events.
+    rows must carry their own id. Does not commit.
+    """
+    if not rows:
+        return
+    db.execute(insert(Supplier), rows)
+    db.execute(insert(SupplierClosure), [
+        {"ancestor_id": row["id"], "descendant_id": row["id"], "depth": 0} for row in rows
+    ])
+
+
+def bulk_update_suppliers(db: Session, owner_id, items) -> list[dict]:
+    """
+    Applies per-supplier field changes for many suppliers in one transaction.
+
+    items are SupplierUpdate payloads with an id. Ownership of every id and
+    every new parent is checked with one IN query and parent changes are
+    checked for cycles in memory. Accepted changes are written as bulk
+    UPDATEs grouped by the set of changed fields. Returns one result per item.
+    """
+    changes = [(item.id, item.dict(exclude_unset=True, exclude={"id"})) for item in items]
+    parent_ids = {values["parent_id"] for _, values in changes if values.get("parent_id")}
+    owned = _owned_ids(db, owner_id, {supplier_id for supplier_id, _ in changes} | parent_ids)
+
+    occurrences = Counter(supplier_id for supplier_id, _ in changes)
+
+    results = {}
+    accepted = {}
+    for supplier_id, values in changes:
+        new_parent_id = values.get("parent_id")
+        if supplier_id not in owned:
+            results[supplier_id] = {"id": str(supplier_id), "status": "not_found"}
+        elif occurrences[supplier_id] > 1:
+            results[supplier_id] = {"id": str(supplier_id), "status": "error", "detail": "Supplier listed more than once"}
+        elif new_parent_id == supplier_id:
+            results[supplier_id] = {"id": str(supplier_id), "status": "error", "detail": "Supplier cannot be its own parent"}
+        elif new_parent_id and new_parent_id not in owned:
+            results[supplier_id] = {"id": str(supplier_id), "status": "error", "detail": "Parent supplier not found or access denied"}
+        else:
+            accepted[supplier_id] = values
+
+    reparented = [(supplier_id, values["parent_id"]) for supplier_id, values in accepted.items() if "parent_id" in values]
+    if reparented:
+        for supplier_id, _ in find_cycles(load_parent_map(db, owner_id), reparented):
+            del accepted[supplier_id]
+            results[supplier_id] = {"id": str(supplier_id), "status": "error", "detail": "Circular supplier hierarchy detected"}
+
+    # One executemany UPDATE per distinct set of changed fields
+    now = datetime.utcnow()
+    batches = {}
+    for supplier_id, values in accepted.items():
+        batches.setdefault(frozenset(values), []).append({"id": supplier_id, **values, "updated_at": now})
+        results[supplier_id] = {"id": str(supplier_id), "status": "updated"}
+    for batch in batches.values():
+        db.execute(update(Supplier), batch)
+
+    if reparented:
+        rebuild_closure(db, owner_id)
+    db.commit()
+
+    return [results[supplier_id] for supplier_id in occurrences]
+
+
+def bulk_delete_suppliers(db: Session, owner_id, ids) -> list[dict]:
+    """
+    Deletes many suppliers with set-based statements in one transaction.
+
+    Children of deleted suppliers become roots, as with the single delete.
+    Spend records and disclosures go with their supplier via ON DELETE CASCADE.
+    """
+    ids = list(dict.fromkeys(ids))
+    owned = _owned_ids(db, owner_id, ids)
+
+    if owned:
+        db.execute(
+            update(Supplier).where(
+                Supplier.parent_id.in_(owned),
+                Supplier.id.not_in(owned)
+            ).values(parent_id=None, updated_at=datetime.utcnow()),
+            execution_options={"synchronize_session": False}
+        )
+        db.execute(
+            delete(SupplierClosure).where(
+                or_(SupplierClosure.ancestor_id.in_(owned), SupplierClosure.descendant_id.in_(owned))
+            ),
+            execution_options={"synchronize_session": False}
+        )
+        db.execute(
+            delete(Supplier).where(Supplier.id.in_(owned)),
+            execution_options={"synchronize_session": False}
+        )
+        rebuild_closure(db, owner_id)
+    db.commit()
+
+    return [
+        {"id": str(supplier_id), "status": "deleted" if supplier_id in owned else "not_found"}
+        for supplier_id in ids
+    ]
@@ -0,0 +1,38 @@
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from app.models.supplier import Supplier
+from app.models.supplier_closure import SupplierClosure
+from app.services.parent_child_circular import load_parent_map
+
+BATCH_SIZE = 5000
+
+
+def iter_closure_rows(parent_map: dict):
+    """(ancestor_id, descendant_id, depth) for every node of a {id: parent_id} forest."""
+    for node in parent_map:
+        current, depth, seen = node, 0, set()
+        # seen guards against hierarchies that already contain a loop
+        while current is not None and current not in seen:
+            seen.add(current)
+            yield current, node, depth
+            current = parent_map.get(current)
+            depth += 1
+
+
+def rebuild_closure(db: Session, owner_id) -> int:
+    """
+    Recomputes the closure rows of an owner's suppliers from parent_id.
+
+    Used after set-based hierarchy changes that bypass the ORM events. Does
+    not commit, so it can share the caller's transaction.
+    """
+    owned = select(Supplier.id).where(Supplier.owner_id == owner_id)
+    db.execute(delete(SupplierClosure).where(SupplierClosure.descendant_id.in_(owned)))
+
+    rows = [
+        {"ancestor_id": ancestor_id, "descendant_id": descendant_id, "depth": depth}
+        for ancestor_id, descendant_id, depth in iter_closure_rows(load_parent_map(db, owner_id))
+    ]
+    for i in range(0, len(rows), BATCH_SIZE):
+        db.execute(insert(SupplierClosure), rows[i:i + BATCH_SIZE])
+    return len(rows)
@@ -1,32 +1,118 @@
 from rapidfuzz import process
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 from app.models.emission_factors import EmissionFactor
 from app.models.supplier import Supplier
 from datetime import datetime
 from app.config.verified_suppliers import VERIFIED_SUPPLIERS
+from app.services.factor_store import current_factor_version, bump_factor_version
+from app.services.disclosure_registry import find_disclosure, match_disclosure_factors
+import threading
 import uuid
 
+
+class FactorNameIndex:
+    """Deduplicated factor names, each mapped to the id of its latest-year factor."""
+
+    def __init__(self, version: str, rows):
+        latest = {}
+        for name, factor_id, year in rows:
+            if name not in latest or year > latest[name][1]:
+                latest[name] = (factor_id, year)
+
+        self.version = version
+        self.ids = {name: factor_id for name, (factor_id, _) in latest.items()}
+        self.names = list(self.ids)
+
+    def match(self, query: str, score_cutoff: float = 90):
+        match = process.extractOne(query, self.names, score_cutoff=score_cutoff)
+        return self.ids[match[0]] if match else None
+
+
+_name_index_lock = threading.Lock()
+_name_index: FactorNameIndex | None = None
+
+
+def get_factor_name_index(db: Session) -> FactorNameIndex:
+    """Built once per factor version stamp (see factor_store.bump_factor_version)."""
+    global _name_index
+    version = current_factor_version(db)
+    if _name_index is not None and _name_index.version == version:
+        return _name_index
+
+    with _name_index_lock:
+        if _name_index is None or _name_index.version != version:
+            _name_index = FactorNameIndex(
+                version,
+                db.query(EmissionFactor.name, EmissionFactor.id, EmissionFactor.year).all()
+            )
+    return _name_index
+
+
+def invalidate_factor_name_index() -> None:
+    global _name_index
+    _name_index = None
+
+def verified_supplier_key(domain: str | None, supplier_name: str | None) -> str | None:
+    """Key into VERIFIED_SUPPLIERS, preferring the domain over the supplier name."""
+    if domain:
+        domain_key = domain.lower().strip()
+        if domain_key in VERIFIED_SUPPLIERS:
+            return domain_key
+
+    if supplier_name:
+        name_key = supplier_name.lower().strip()
+        if name_key in VERIFIED_SUPPLIERS:
+            return name_key
+
+    return None
+
+
+def build_verified_factor(data: dict, region: str | None, owner_id) -> dict:
+    """Column values for a synthetic factor derived from a verified disclosure."""
+    # Calculate total and granular intensities
+    revenue = float(data["revenue"])
+    total_emissions = float(data["scope_1"] + data["scope_2"] + data["scope_3"])
+
+    return {
+        "id": uuid.uuid4(),
+        "external_id": None,
+        "provider": "Verified Supplier Disclosure",
+        "name": data["name"],
+        # ---Geographic Hierarchy Fallback ---
+        "geography": region if region else "Global",
+        "year": data["year"],
+        # --- Hybrid and Granular Scope Data ---
+        "unit_of_measure": "USD",
+        "co2e_per_unit": (total_emissions / revenue),
+        "scope_1_intensity": (float(data["scope_1"]) / revenue),
+        "scope_2_intensity": (float(data["scope_2"]) / revenue),
+        "scope_3_intensity": (float(data["scope_3"]) / revenue),
+        "source_url": None,
+        "methodology": "Direct corporate disclosure override",
+        "version": "1.0",
+        "owner_id": owner_id
+    }
+
 def resolve_supplier_factor(db: Session, supplier: Supplier):
     """
     Assigns a resolved emission factor to a supplier.
 
     Priority:
-    1. Use verified supplier disclosures if available.
-    2. Fuzzy match the supplier's industry to available emission factors.
+    1. Use the verified disclosure registry if it has the company.
+    2. Use the built-in verified supplier list.
+    3. Fuzzy match the supplier's industry to available emission factors.
     """
-    
-    # Check for Verified Supplier Overrides
-    match_key = None
 
-    if supplier.domain:
-        domain_key = supplier.domain.lower().strip()
-        if domain_key in VERIFIED_SUPPLIERS:
-            match_key = domain_key
+    # Check the disclosure registry
+    disclosure = find_disclosure(db, supplier.domain, supplier.supplier_name)
+    if disclosure:
+        supplier.resolved_factor_id = disclosure.emission_factor_id
+        db.commit()
+        return db.get(EmissionFactor, disclosure.emission_factor_id)
 
-    if not match_key and supplier.supplier_name:
-        name_key = supplier.supplier_name.lower().strip()
-        if name_key in VERIFIED_SUPPLIERS:
-            match_key = name_key
+    # Check for Verified Supplier Overrides
+    match_key = verified_supplier_key(supplier.domain, supplier.supplier_name)
     
     if match_key:
         data = VERIFIED_SUPPLIERS[match_key]
@@ -38,64 +124,137 @@ def resolve_supplier_factor(db: Session, supplier: Supplier):
 
         # If not, create a synthetic emission factor for this supplier
         if not factor:
-            # Calculate total and granular intensities
-            revenue = float(data["revenue"])
-            total_emissions = float(data["scope_1"] + data["scope_2"] + data["scope_3"])
-            
             factor = EmissionFactor(
-                id=uuid.uuid4(),
-                external_id=None,
-                provider="Verified Supplier Disclosure",
-                name=data["name"],
-                # ---Geographic Hierarchy Fallback ---
-                geography=supplier.region if supplier.region else "Global",
-                year=data["year"],
-                # --- Hybrid and Granular Scope Data ---
-                unit_of_measure="USD",
-                co2e_per_unit=(total_emissions / revenue),
-                scope_1_intensity=(float(data["scope_1"]) / revenue),
-                scope_2_intensity=(float(data["scope_2"]) / revenue),
-                scope_3_intensity=(float(data["scope_3"]) / revenue),
-                source_url=None,
-                methodology="Direct corporate disclosure override",
-                version="1.0",
-                owner_id=supplier.owner_id  
+                **build_verified_factor(data, supplier.region, supplier.owner_id)
             )
             db.add(factor)
             db.commit()
             db.refresh(factor)
+            bump_factor_version(db)
 
         supplier.resolved_factor_id = factor.id
         db.commit()
         return factor
 
 
-    # 2. Fallback to Fuzzy Industry Match
+    # 3. Fallback to Fuzzy Industry Match
     if not supplier.industry_locked:
         return None
 
-    factors = db.query(EmissionFactor).all()
-    factor_names = [f.name for f in factors]
-
-    match = process.extractOne(
-        supplier.industry_locked,
-        factor_names,
-        score_cutoff=90
-    )
+    matched_id = get_factor_name_index(db).match(supplier.industry_locked)
 
-    if not match:
+    if not matched_id:
         return None
 
-    matched_name = match[0]
-    matched_factor = (
-        db.query(EmissionFactor)
-        .filter(EmissionFactor.name == matched_name)
-        .order_by(EmissionFactor.year.desc())
-        .first()
-    )
+    matched_factor = db.get(EmissionFactor, matched_id)
 
     if matched_factor:
         supplier.resolved_factor_id = matched_factor.id
         db.commit()
+    else:
+        # Factor was removed since the index was built
+        invalidate_factor_name_index()
+
+    return matched_factor
+
+
+def resolve_unresolved_suppliers(db: Session, owner_id, chunk_size: int = 1000) -> dict:
+    """
+    Resolves every supplier of an owner that has no resolved factor yet.
+
+    Suppliers are processed in id order, chunk by chunk. Each chunk makes one
+    disclosure registry lookup, one verified-supplier pass (missing synthetic
+    factors are inserted in bulk), one fuzzy pass against the factor name
+    index and a single bulk update of resolved_factor_id.
+    """
+    report = {"processed": 0, "verified": 0, "fuzzy": 0, "unresolved": 0, "factors_created": 0}
+    industry_matches = {}
+    last_id = None
+
+    while True:
+        query = db.query(
+            Supplier.id,
+            Supplier.supplier_name,
+            Supplier.domain,
+            Supplier.region,
+            Supplier.industry_locked
+        ).filter(
+            Supplier.owner_id == owner_id,
+            Supplier.resolved_factor_id.is_(None)
+        )
+        if last_id is not None:
+            query = query.filter(Supplier.id > last_id)
+        rows = query.order_by(Supplier.id).limit(chunk_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        # 1. Disclosure registry, then the built-in verified supplier list
+        registry = match_disclosure_factors(db, [(row.domain, row.supplier_name) for row in rows])
+        verified = {}
+        for row in rows:
+            if (row.domain, row.supplier_name) in registry:
+                continue
+            match_key = verified_supplier_key(row.domain, row.supplier_name)
+            if match_key:
+                verified[row.id] = (match_key, row.region)
+
+        factor_ids = {}
+        if verified:
+            wanted = {VERIFIED_SUPPLIERS[key]["name"] for key, _ in verified.values()}
+            for factor_id, name, year in db.query(
+                EmissionFactor.id, EmissionFactor.name, EmissionFactor.year
+            ).filter(EmissionFactor.name.in_(wanted)):
+                factor_ids.setdefault((name, year), factor_id)
+
+            new_factors = []
+            for match_key, region in verified.values():
+                data = VERIFIED_SUPPLIERS[match_key]
+                if (data["name"], data["year"]) not in factor_ids:
+                    factor = build_verified_factor(data, region, owner_id)
+                    factor_ids[(data["name"], data["year"])] = factor["id"]
+                    new_factors.append(factor)
+
+            if new_factors:
+                db.execute(insert(EmissionFactor), new_factors)
+                report["factors_created"] += len(new_factors)
+
+        # 2. Fuzzy industry pass, one match per distinct industry
+        index = get_factor_name_index(db)
+        updates = []
+        for row in rows:
+            registry_id = registry.get((row.domain, row.supplier_name))
+            if registry_id:
+                updates.append({"id": row.id, "resolved_factor_id": registry_id})
+                report["verified"] += 1
+                continue
+
+            if row.id in verified:
+                data = VERIFIED_SUPPLIERS[verified[row.id][0]]
+                updates.append({"id": row.id, "resolved_factor_id": factor_ids[(data["name"], data["year"])]})
+                report["verified"] += 1
+                continue
+
+            if row.industry_locked and row.industry_locked not in industry_matches:
+                industry_matches[row.industry_locked] = index.match(row.industry_locked)
+
+            matched_id = industry_matches.get(row.industry_locked)
+            if matched_id:
+                updates.append({"id": row.id, "resolved_factor_id": matched_id})
+                report["fuzzy"] += 1
+            else:
+                report["unresolved"] += 1
+
+        # 3. One bulk update per chunk
+        if updates:
+            now = datetime.utcnow()
+            for values in updates:
+                values["updated_at"] = now
+            db.execute(update(Supplier), updates)
+        db.commit()
+        report["processed"] += len(rows)
+
+    if report["factors_created"]:
+        bump_factor_version(db)
 
-    return matched_factor
\ No newline at end of file
+    return report
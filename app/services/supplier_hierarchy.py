@@ -0,0 +1,84 @@
+from datetime import datetime
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.models.supplier import Supplier
+from app.services.parent_child_circular import find_cycles
+from app.services.supplier_closure import rebuild_closure
+
+
+def _name_key(name: str | None) -> str | None:
+    return name.strip().lower() if name and name.strip() else None
+
+
+def import_hierarchy(db: Session, owner_id, edges) -> dict:
+    """
+    Applies many (child, parent) edges to an owner's supplier forest at once.
+
+    Suppliers are loaded in one query and every edge is validated in memory
+    (ownership, ambiguity, duplicates, cycles over the merged forest). If any
+    edge is invalid nothing is written and the errors are returned; otherwise
+    all parent_id changes go out as one bulk UPDATE and the closure table is
+    rebuilt once.
+    """
+    suppliers = db.query(Supplier.id, Supplier.supplier_name, Supplier.parent_id).filter(
+        Supplier.owner_id == owner_id
+    ).all()
+
+    parent_map = {s.id: s.parent_id for s in suppliers}
+    ids_by_name = {}
+    for s in suppliers:
+        ids_by_name.setdefault(_name_key(s.supplier_name), []).append(s.id)
+
+    def lookup(supplier_id, name, role, number):
+        if supplier_id is not None:
+            if supplier_id in parent_map:
+                return supplier_id
+            raise ValueError(f"Edge {number}: {role} {supplier_id} not found or access denied.")
+        matches = ids_by_name.get(_name_key(name), [])
+        if len(matches) == 1:
+            return matches[0]
+        if matches:
+            raise ValueError(f"Edge {number}: {role} name '{name}' matches {len(matches)} suppliers.")
+        raise ValueError(f"Edge {number}: {role} '{name}' not found or access denied.")
+
+    errors = []
+    resolved = {}
+    for number, edge in enumerate(edges, start=1):
+        try:
+            if edge.child_id is None and not _name_key(edge.child_name):
+                raise ValueError(f"Edge {number}: child_id or child_name is required.")
+            child_id = lookup(edge.child_id, edge.child_name, "child", number)
+
+            parent_id = None
+            if edge.parent_id is not None or _name_key(edge.parent_name):
+                parent_id = lookup(edge.parent_id, edge.parent_name, "parent", number)
+
+            if parent_id == child_id:
+                raise ValueError(f"Edge {number}: supplier cannot be its own parent.")
+            if child_id in resolved:
+                raise ValueError(f"Edge {number}: child already assigned by edge {resolved[child_id][0]}.")
+        except ValueError as e:
+            errors.append(str(e))
+            continue
+        resolved[child_id] = (number, parent_id)
+
+    # Topological check over the forest with every proposed edge merged in
+    proposed = [(child_id, parent_id) for child_id, (_, parent_id) in resolved.items()]
+    for child_id, _ in find_cycles(parent_map, proposed):
+        errors.append(f"Edge {resolved[child_id][0]}: circular supplier hierarchy detected.")
+
+    if errors:
+        return {"updated": 0, "unchanged": 0, "error_count": len(errors), "errors": errors[:50]}
+
+    now = datetime.utcnow()
+    changes = [
+        {"id": child_id, "parent_id": parent_id, "updated_at": now}
+        for child_id, parent_id in proposed
+        if parent_map[child_id] != parent_id
+    ]
+    if changes:
+        db.execute(update(Supplier), changes)
+        rebuild_closure(db, owner_id)
+    db.commit()
+
+    return {"updated": len(changes), "unchanged": len(proposed) - len(changes), "error_count": 0, "errors": []}
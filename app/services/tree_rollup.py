@@ -1,71 +1,253 @@
-from sqlalchemy import select, func
-from sqlalchemy.orm import aliased, Session
+from sqlalchemy import func, and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
 from app.models.supplier import Supplier
+from app.models.supplier_closure import SupplierClosure
 from app.models.spend import SpendRecord
 from app.models.emission_factors import EmissionFactor
 
-def get_supplier_tree_rollup(db: Session, supplier_id: str):
-    supplier_alias = aliased(Supplier)
+ROLLUP_METRICS = {
+    "spend": SpendRecord.spend_amount,
+    "co2e": SpendRecord.calculated_co2e,
+    "scope_1": SpendRecord.calculated_scope_1,
+    "scope_2": SpendRecord.calculated_scope_2,
+    "scope_3": SpendRecord.calculated_scope_3,
+}
 
-    # Base query
-    supplier_tree = select(Supplier.id).where(
-        Supplier.id == supplier_id
-    ).cte(name="supplier_tree", recursive=True)
+def _empty_subtotal(**fields):
+    return {**fields, "supplier_count": 0, **{metric: 0.0 for metric in ROLLUP_METRICS}}
 
-    # Recursive part
-    supplier_tree = supplier_tree.union_all(
-        select(supplier_alias.id).where(
-            supplier_alias.parent_id == supplier_tree.c.id
+def _add_subtotal(subtotal, row):
+    subtotal["supplier_count"] += row.supplier_count
+    for metric in ROLLUP_METRICS:
+        subtotal[metric] += float(getattr(row, metric))
+
+def get_supplier_tree_rollup(db: Session, supplier_id, max_depth: int = None):
+    """
+    Roll spend and emissions up a supplier's subtree.
+
+    Besides the subtree totals, returns subtotals per depth below the supplier
+    and per direct child (each child's whole branch), from one grouped query
+    over the closure table. max_depth limits how far down the tree is counted.
+    """
+    node = aliased(SupplierClosure)
+    branch = aliased(SupplierClosure)
+    child = aliased(Supplier)
+
+    # branch.ancestor_id is the direct child of supplier_id on the path to each descendant
+    query = db.query(
+        node.depth.label("depth"),
+        branch.ancestor_id.label("child_id"),
+        child.supplier_name.label("child_name"),
+        func.count(func.distinct(node.descendant_id)).label("supplier_count"),
+        *[func.coalesce(func.sum(column), 0).label(metric) for metric, column in ROLLUP_METRICS.items()]
+    ).outerjoin(
+        branch,
+        and_(
+            branch.descendant_id == node.descendant_id,
+            branch.depth == node.depth - 1
         )
+    ).outerjoin(
+        child,
+        child.id == branch.ancestor_id
+    ).outerjoin(
+        SpendRecord,
+        SpendRecord.supplier_id == node.descendant_id
+    ).filter(
+        node.ancestor_id == supplier_id
+    ).group_by(
+        node.depth, branch.ancestor_id, child.supplier_name
     )
 
-    # Rollup spend
-    total_spend = db.query(
-        func.coalesce(func.sum(SpendRecord.spend_amount), 0)
-    ).filter(
-        SpendRecord.supplier_id.in_(
-            select(supplier_tree.c.id)
-        )
-    ).scalar()
+    if max_depth is not None:
+        query = query.filter(node.depth <= max_depth)
 
-    # Rollup emissions
-    total_emissions = db.query(
-        func.coalesce(func.sum(SpendRecord.calculated_co2e), 0)
-    ).filter(
-        SpendRecord.supplier_id.in_(
-            select(supplier_tree.c.id)
-        )
-    ).scalar()
+    totals = _empty_subtotal()
+    by_depth = {}
+    children = {}
+    for row in query.all():
+        _add_subtotal(totals, row)
+        _add_subtotal(by_depth.setdefault(row.depth, _empty_subtotal(depth=row.depth)), row)
+        if row.child_id is not None:
+            _add_subtotal(
+                children.setdefault(
+                    row.child_id,
+                    _empty_subtotal(supplier_id=str(row.child_id), supplier_name=row.child_name)
+                ),
+                row
+            )
 
     return {
-        "supplier_id": supplier_id,
-        "total_spend": float(total_spend),
-        "total_emissions": float(total_emissions)
+        "supplier_id": str(supplier_id),
+        "total_spend": totals["spend"],
+        "total_emissions": totals["co2e"],
+        "total_scope_1": totals["scope_1"],
+        "total_scope_2": totals["scope_2"],
+        "total_scope_3": totals["scope_3"],
+        "supplier_count": totals["supplier_count"],
+        "by_depth": [by_depth[depth] for depth in sorted(by_depth)],
+        "children": sorted(children.values(), key=lambda c: (-c["co2e"], c["supplier_name"] or ""))
     }
 
-def get_effective_factor(db: Session, supplier_id: str):
+def get_supplier_tree(db: Session, owner_id, root_id=None, max_depth: int = None) -> list[dict]:
     """
-    Traverse up the supplier corporate tree to find the nearest assigned emission factor.
+    Nested {..., "children": [...]} dicts for an owner's supplier forest.
+
+    All suppliers (or only root_id's subtree, via the closure table) are
+    loaded in one query and linked in memory in O(n), so walking the result
+    never triggers lazy relationship loads. max_depth cuts off deeper levels.
     """
-    current_id = supplier_id
-    visited = set()
+    query = db.query(*Supplier.__table__.columns).filter(Supplier.owner_id == owner_id)
+    if root_id is not None:
+        query = query.join(
+            SupplierClosure,
+            and_(
+                SupplierClosure.descendant_id == Supplier.id,
+                SupplierClosure.ancestor_id == root_id
+            )
+        )
+        if max_depth is not None:
+            query = query.filter(SupplierClosure.depth <= max_depth)
+
+    nodes = {row.id: {**row._mapping, "children": []} for row in query.order_by(Supplier.supplier_name, Supplier.id)}
 
-    while current_id:
-        if current_id in visited:
-            break  # Prevent infinite loops in case of circular dependencies
-        visited.add(current_id)
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node["parent_id"])
+        if node["id"] == root_id or parent is None:
+            roots.append(node)
+        else:
+            parent["children"].append(node)
 
-        supplier = db.query(Supplier).filter(Supplier.id == current_id).first()
-        if not supplier:
-            break
+    if root_id is not None:
+        return [nodes[root_id]] if root_id in nodes else []
 
-        # If this supplier in the tree has a locked factor, return it
-        if supplier.resolved_factor_id:
-            factor = db.query(EmissionFactor).filter(EmissionFactor.id == supplier.resolved_factor_id).first()
-            if factor:
-                return factor
+    if max_depth is not None:
+        stack = [(node, 0) for node in roots]
+        while stack:
+            node, depth = stack.pop()
+            if depth >= max_depth:
+                node["children"] = []
+            else:
+                stack.extend((child, depth + 1) for child in node["children"])
 
-        # Move up to the parent
-        current_id = supplier.parent_id
+    return roots
+
+def supplier_rankings_query(owner_id, top: int = None, sort: str = "co2e", rollup: str = None):
+    """
+    Statement ranking an owner's suppliers by emissions, spend or name.
+
+    With rollup="subtree" each supplier is credited with the spend of its whole
+    corporate subtree, so parent companies rank by consolidated emissions.
+    Sorting and limiting happen in the database.
+    """
+    total_co2e = func.coalesce(func.sum(SpendRecord.calculated_co2e), 0)
+    total_spend = func.coalesce(func.sum(SpendRecord.spend_amount), 0)
 
-    return None
\ No newline at end of file
+    if rollup == "subtree":
+        # Every supplier is paired with itself and all of its descendants
+        query = select(
+            Supplier.id,
+            Supplier.supplier_name,
+            total_co2e.label("total_co2e"),
+            total_spend.label("total_spend")
+        ).join(
+            SupplierClosure,
+            SupplierClosure.ancestor_id == Supplier.id
+        ).outerjoin(
+            SpendRecord,
+            and_(
+                SpendRecord.owner_id == owner_id,
+                SpendRecord.supplier_id == SupplierClosure.descendant_id
+            )
+        ).filter(
+            Supplier.owner_id == owner_id
+        ).group_by(
+            Supplier.id, Supplier.supplier_name
+        )
+    else:
+        query = select(
+            Supplier.id,
+            Supplier.supplier_name,
+            total_co2e.label("total_co2e"),
+            total_spend.label("total_spend")
+        ).outerjoin(
+            SpendRecord,
+            and_(
+                SpendRecord.owner_id == owner_id,
+                SpendRecord.supplier_id == Supplier.id
+            )
+        ).filter(
+            Supplier.owner_id == owner_id
+        ).group_by(
+            Supplier.id, Supplier.supplier_name
+        )
+
+    if sort == "name":
+        query = query.order_by(Supplier.supplier_name.asc(), Supplier.id)
+    elif sort == "spend":
+        query = query.order_by(total_spend.desc(), Supplier.id)
+    else:
+        query = query.order_by(total_co2e.desc(), Supplier.id)
+
+    if top:
+        query = query.limit(top)
+
+    return query
+
+def _format_rankings(rows):
+    return [
+        {
+            "id": str(s.id),
+            "supplier_name": s.supplier_name,
+            "total_co2e": float(s.total_co2e),
+            "total_spend": float(s.total_spend)
+        }
+        for s in rows
+    ]
+
+def get_supplier_rankings(db: Session, owner_id, top: int = None, sort: str = "co2e", rollup: str = None):
+    return _format_rankings(db.execute(supplier_rankings_query(owner_id, top, sort, rollup)))
+
+async def get_supplier_rankings_async(db: AsyncSession, owner_id, top: int = None, sort: str = "co2e", rollup: str = None):
+    return _format_rankings(await db.execute(supplier_rankings_query(owner_id, top, sort, rollup)))
+
+def get_effective_factor(db: Session, supplier_id: str):
+    """
+    Find the nearest assigned emission factor up the supplier corporate tree,
+    starting with the supplier itself.
+    """
+    return db.query(EmissionFactor).join(
+        Supplier,
+        Supplier.resolved_factor_id == EmissionFactor.id
+    ).join(
+        SupplierClosure,
+        SupplierClosure.ancestor_id == Supplier.id
+    ).filter(
+        SupplierClosure.descendant_id == supplier_id
+    ).order_by(
+        SupplierClosure.depth
+    ).first()
+
+def get_effective_factors(db: Session, supplier_ids) -> dict:
+    """
+    Bulk get_effective_factor: {supplier_id: nearest assigned factor up its
+    tree} for every supplier that has one, in one closure query per chunk.
+    """
+    supplier_ids = list(supplier_ids)
+    factors = {}
+    for i in range(0, len(supplier_ids), 5000):
+        rows = db.query(SupplierClosure.descendant_id, EmissionFactor).join(
+            Supplier,
+            Supplier.id == SupplierClosure.ancestor_id
+        ).join(
+            EmissionFactor,
+            Supplier.resolved_factor_id == EmissionFactor.id
+        ).filter(
+            SupplierClosure.descendant_id.in_(supplier_ids[i:i + 5000])
+        ).order_by(
+            SupplierClosure.descendant_id, SupplierClosure.depth
+        )
+        for supplier_id, factor in rows:
+            factors.setdefault(supplier_id, factor)
+    return factors
\ No newline at end of file
@@ -1,13 +1,25 @@
+import os
+import tempfile
 import pytest
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 from fastapi.testclient import TestClient
+
+# Each test gets a fresh database, so factor lookups must not be served from the shared store
+os.environ.setdefault("FACTOR_STORE_ENABLED", "false")
+os.environ.setdefault("FACTOR_STORE_DIR", tempfile.mkdtemp(prefix="scopeops-factor-store-"))
+
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_async_db
+from app.services.supplier_factor import invalidate_factor_name_index
+from app.services.auth_cache import token_user_cache
+from app.services.query_counter import count_queries as _count_queries
 
-# Use in-memory SQLite for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# File-backed SQLite, so the sync and async engines see the same data
+SQLALCHEMY_DATABASE_PATH = os.path.join(tempfile.mkdtemp(prefix="scopeops-test-db-"), "test.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{SQLALCHEMY_DATABASE_PATH}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, 
@@ -17,10 +29,16 @@ engine = create_engine(
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# NullPool: each TestClient runs its own event loop, so connections are not reused
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{SQLALCHEMY_DATABASE_PATH}", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 @pytest.fixture(scope="function")
 def db_session():
     """Creates a fresh database for every test function."""
     Base.metadata.create_all(bind=engine)
+    invalidate_factor_name_index()
+    token_user_cache.clear()
     db = TestingSessionLocal()
     try:
         yield db
@@ -37,6 +55,22 @@ def client(db_session):
         finally:
             db_session.close()
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as c:
-        yield c
\ No newline at end of file
+        yield c
+
+@pytest.fixture
+def count_queries():
+    """
+    Statement budget for a block, across both test engines:
+
+        with count_queries() as queries:
+            client.post(...)
+        assert queries.count <= 20, queries
+    """
+    return lambda: _count_queries(engine, async_engine)
@@ -1,11 +1,40 @@
+import asyncio
+import io
+import multiprocessing as mp
+import os
+import time
 import uuid
+import pytest
+from datetime import datetime
+from decimal import Decimal
+import numpy as np
+import openpyxl
 from app.models.supplier import Supplier
 from app.models.spend import SpendRecord
 from app.models.emission_factors import EmissionFactor
 from app.models.user import User
-from app.services.parent_child_circular import creates_cycle
+from app.models.supplier_closure import SupplierClosure
+from app.models.category import Category
+from app.models.category_factor_mapping import CategoryFactorMapping
+from app.services.entity_resolution import resolve_supplier
+from app.services.parent_child_circular import creates_cycle, find_cycles, load_parent_map
 from app.services.emission_calculator import calculate_emissions
 from app.services.supplier_factor import resolve_supplier_factor
+from app.services.ceda_snapshot import compile_snapshot, load_snapshot
+from app.scripts import seed_ceda_delta
+from app.scripts.seed_ceda_delta import diff_release, load_stored
+from collections import Counter
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.services import factor_store
+from app.services.factor_store import FactorStore, build_factor_store, bump_factor_version, get_factor_store, warm_factor_store
+from app.services.supplier_closure import rebuild_closure
+from app.services.security import PasswordHasher, PasswordHasherBusy
+from app.services.disclosure_registry import parse_disclosure_row, read_disclosure_file
+from app.services import fast_json, metrics
+from app.database import _default_async_url
+from app.scripts import run_seed
 
 def test_circular_dependency_check(db_session):
     """Test that A -> B -> A is detected as a cycle."""
@@ -94,4 +123,499 @@ def test_emission_calculation_logic(db_session):
     
     # Expect: 1000 * 0.5 = 500.0
     assert spend.calculated_co2e == 500.0
-    assert spend.calculation_method == "Supplier_Locked"
\ No newline at end of file
+    assert spend.calculation_method == "Supplier_Locked"
+
+def test_calculation_statement_count_does_not_grow_with_records(db_session, count_queries):
+    """Pricing 20 or 400 records across suppliers, mappings and CEDA factors takes the same statements."""
+    user_id = uuid.uuid4()
+    system_user = User(email="system_epa@scopeops.local", provider="system")
+    db_session.add(system_user)
+    db_session.flush()
+    suppliers = [
+        Supplier(id=uuid.uuid4(), supplier_name=f"Farm {i}", industry_locked="Farming", region=region, owner_id=user_id)
+        for i, region in enumerate(["United States", "France", None, "Peru"])
+    ]
+    db_session.add_all(suppliers + [
+        EmissionFactor(
+            id=uuid.uuid4(), external_id=f"OPEN-CEDA-2025-{code}", provider="Open CEDA",
+            name=code, geography=geography, year=2023, unit_of_measure="USD",
+            co2e_per_unit=1, version="1", owner_id=system_user.id
+        )
+        for code in ["1111A0", "1111B0"] for geography in ["United States", "France", "Global"]
+    ])
+    db_session.commit()
+
+    def calculate(n, first_id):
+        db_session.add_all([
+            SpendRecord(
+                spend_id=first_id + i, supplier_id=suppliers[i % len(suppliers)].id,
+                category_code=["1111A0", "1111b0", "UNMAPPED"][i % 3], spend_amount=100,
+                fiscal_year=2024, owner_id=user_id
+            )
+            for i in range(n)
+        ])
+        db_session.commit()
+        with count_queries() as queries:
+            calculate_emissions(db_session)
+        return queries
+
+    small, large = calculate(20, 1), calculate(400, 1000)
+    assert large.count == small.count, large
+    assert large.count <= 10, large
+    assert db_session.query(SpendRecord).filter(SpendRecord.calculation_method == None).count() == 0
+
+
+def test_uncalculated_records_scan_uses_partial_index(db_session):
+    """calculate_emissions' pending-record query is served by the calculated_co2e IS NULL index."""
+    query = db_session.query(SpendRecord).filter(SpendRecord.calculated_co2e == None)
+    sql = str(query.statement.compile(db_session.get_bind()))
+    plan = " ".join(str(row) for row in db_session.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+    assert "ix_spend_records_uncalculated" in plan
+
+
+def test_category_mapping_lookup_is_case_insensitive_and_literal(db_session):
+    """Mappings match category codes ignoring case; "_" and "%" in a code are not wildcards."""
+    user_id = uuid.uuid4()
+    system_user = User(email="system_epa@scopeops.local", provider="system")
+    db_session.add(system_user)
+    db_session.flush()
+
+    def ceda_factor(code, value):
+        return EmissionFactor(
+            id=uuid.uuid4(), external_id=f"OPEN-CEDA-2025-{code}", provider="Open CEDA",
+            name=code, geography="Global", year=2023, unit_of_measure="USD",
+            co2e_per_unit=value, version="1", owner_id=system_user.id
+        )
+
+    mixxa, mix_a = ceda_factor("MIXXA", 2), ceda_factor("MIX_A", 1)
+    supplier = Supplier(id=uuid.uuid4(), supplier_name="Mill", industry_locked="Milling", owner_id=user_id)
+    mapped = SpendRecord(spend_id=1, supplier_id=supplier.id, category_code="mixxa", spend_amount=100, fiscal_year=2024, owner_id=user_id)
+    direct = SpendRecord(spend_id=2, supplier_id=supplier.id, category_code="MIX_A", spend_amount=100, fiscal_year=2024, owner_id=user_id)
+    db_session.add_all([
+        mixxa, mix_a, supplier, mapped, direct,
+        Category(category_id="MIXXA", category_name="Mixed A"),
+        CategoryFactorMapping(category_id="MIXXA", emission_factor_id=mixxa.id)
+    ])
+    db_session.commit()
+
+    calculate_emissions(db_session)
+
+    # The mapping wins over the direct code for "mixxa" (its target is looked up by external_id)
+    assert mapped.calculation_method == "Requires_Mapping"
+    # "MIX_A" is not a LIKE pattern for "MIXXA", so it prices by its own code
+    assert direct.calculated_co2e == 100
+    assert direct.calculation_method == "CEDA_Global_Fallback"
+
+
+def test_resolve_supplier_loads_candidates_in_one_statement(db_session, count_queries):
+    """Matching a name against 200 suppliers is one query plus in-memory scoring."""
+    user_id = uuid.uuid4()
+    db_session.add_all([
+        Supplier(id=uuid.uuid4(), supplier_name=f"Supplier {i:03d} Holdings", industry_locked="Tech", owner_id=user_id)
+        for i in range(200)
+    ] + [Supplier(id=uuid.uuid4(), supplier_name="Acme Corporation", industry_locked="Tech", owner_id=user_id)])
+    db_session.commit()
+
+    with count_queries() as queries:
+        result = resolve_supplier(db_session, "Acme Corporation", user_id)
+
+    assert queries.count == 1, queries
+    assert result["status"] == "AUTO_MATCHED"
+
+
+def test_ceda_snapshot_compiled_once_per_workbook_hash(tmp_path):
+    """The Conversion/Raw sheets compile to memory-mapped arrays keyed by SHA-256."""
+    wb = openpyxl.Workbook()
+    conv = wb.active
+    conv.title = "Conversion"
+    conv.append(["Sector Code", "1111A0", "1111B0", "1112A0", "1113A0", "1114A0"])
+    conv.append(["Purchaser - Producer Conversion", 0.5, 2, 1, 1, 1])
+    raw = wb.create_sheet("Raw")
+    raw.append(["Country Code", "Country", "1111A0", "1111B0", "1112A0", "1113A0", "1114A0"])
+    raw.append(["USA", "United States", 0.4, None, 1, 1, 1])
+    xlsx_path = tmp_path / "ceda.xlsx"
+    wb.save(xlsx_path)
+
+    snapshot_dir = tmp_path / "snapshots"
+    snapshot = load_snapshot(xlsx_path, snapshot_dir)
+
+    assert list(snapshot.sector_codes[:2]) == ["1111A0", "1111B0"]
+    assert list(snapshot.country_names) == ["United States"]
+    assert snapshot.matrix[0, 0] == 0.4
+    assert np.isnan(snapshot.matrix[0, 1])
+    assert isinstance(snapshot.matrix, np.memmap)
+    assert compile_snapshot(xlsx_path, snapshot_dir).name == snapshot.sha256
+
+
+def test_ceda_lookup_uses_normalized_geography(db_session):
+    """Supplier regions match factor geographies case/space-insensitively, else fall back."""
+    user_id = uuid.uuid4()
+    system_user = User(email="system_epa@scopeops.local", provider="system")
+    db_session.add(system_user)
+    db_session.flush()
+
+    def ceda_factor(geography, value):
+        return EmissionFactor(
+            id=uuid.uuid4(), external_id="OPEN-CEDA-2025-1111A0", provider="Open CEDA",
+            name="Oilseed farming (1111A0)", geography=geography, year=2023,
+            unit_of_measure="USD", co2e_per_unit=value, version="1", owner_id=system_user.id
+        )
+
+    local = Supplier(id=uuid.uuid4(), supplier_name="Local Farm", industry_locked="Farming", region=" united  STATES ", owner_id=user_id)
+    remote = Supplier(id=uuid.uuid4(), supplier_name="Remote Farm", industry_locked="Farming", owner_id=user_id)
+    local_spend = SpendRecord(spend_id=1, supplier_id=local.id, category_code="1111a0", spend_amount=100, fiscal_year=2024, owner_id=user_id)
+    remote_spend = SpendRecord(spend_id=2, supplier_id=remote.id, category_code="1111a0", spend_amount=100, fiscal_year=2024, owner_id=user_id)
+
+    db_session.add_all([
+        ceda_factor("United States", 2), ceda_factor("Global", 1),
+        local, remote, local_spend, remote_spend
+    ])
+    db_session.commit()
+
+    assert calculate_emissions(db_session) == 2
+    assert local_spend.calculated_co2e == 200
+    assert remote_spend.calculated_co2e == 100
+    assert remote_spend.calculation_method == "CEDA_Global_Fallback"
+
+
+def test_ceda_delta_diff_counts():
+    """Only value changes beyond stored precision count as changed."""
+    stored = {
+        ("OPEN-CEDA-2025-A", "France"): ("id-1", Decimal("0.50135")),
+        ("OPEN-CEDA-2025-B", "France"): ("id-2", Decimal("1.00000")),
+        ("OPEN-CEDA-2025-C", "France"): ("id-3", Decimal("2.00000")),
+    }
+    incoming = {
+        ("OPEN-CEDA-2025-A", "France"): ("A", Decimal("0.5013450")),
+        ("OPEN-CEDA-2025-B", "France"): ("B", Decimal("1.25")),
+        ("OPEN-CEDA-2025-D", "France"): ("D", Decimal("3")),
+    }
+
+    added, changed, removed = diff_release(stored, incoming)
+
+    assert added == [("OPEN-CEDA-2025-D", "France")]
+    assert changed == [("id-2", ("OPEN-CEDA-2025-B", "France"))]
+    assert removed == [("OPEN-CEDA-2025-C", "France")]
+
+
+def test_ceda_delta_ignores_private_and_duplicate_factors(db_session):
+    """Only the system user's factors are diffed; duplicated keys are reported, not touched."""
+    sys_user_id, private_user_id = uuid.uuid4(), uuid.uuid4()
+
+    def ceda_factor(ext_id, owner_id):
+        return EmissionFactor(
+            id=uuid.uuid4(), external_id=ext_id, provider="Open CEDA", name=ext_id,
+            geography="France", year=2023, unit_of_measure="USD", co2e_per_unit=1,
+            version="1", owner_id=owner_id
+        )
+
+    db_session.add_all([
+        ceda_factor("OPEN-CEDA-2025-A", sys_user_id),
+        ceda_factor("OPEN-CEDA-2025-B", sys_user_id),
+        ceda_factor("OPEN-CEDA-2025-B", sys_user_id),
+        ceda_factor("OPEN-CEDA-2025-P", private_user_id),
+    ])
+    db_session.commit()
+
+    stored, duplicates = load_stored(db_session, sys_user_id)
+    assert list(stored) == [("OPEN-CEDA-2025-A", "France")]
+    assert duplicates == [("OPEN-CEDA-2025-B", "France")]
+
+    incoming = {key: ("X", Decimal("2")) for key in [("OPEN-CEDA-2025-B", "France"), ("OPEN-CEDA-2025-P", "France")]}
+    added, changed, removed = diff_release(stored, incoming, skip=duplicates)
+    assert added == [("OPEN-CEDA-2025-P", "France")]
+    assert changed == []
+    assert removed == [("OPEN-CEDA-2025-A", "France")]
+
+
+def test_ceda_delta_lands_all_or_nothing(db_session, monkeypatch):
+    """A failure while inserting new factors rolls back the updates too, and nothing is published."""
+    sys_user_id = seed_ceda_delta.get_system_user(db_session)
+    db_session.add(EmissionFactor(
+        id=uuid.uuid4(), external_id="OPEN-CEDA-2025-A", provider="Open CEDA", name="A",
+        geography="France", year=2023, unit_of_measure="USD", co2e_per_unit=1, version="1", owner_id=sys_user_id
+    ))
+    db_session.commit()
+
+    incoming = {("OPEN-CEDA-2025-A", "France"): ("A", Decimal("2")), ("OPEN-CEDA-2025-B", "France"): ("B", Decimal("3"))}
+    published = []
+    monkeypatch.setattr(seed_ceda_delta, "engine", db_session.get_bind())
+    monkeypatch.setattr(seed_ceda_delta, "load_snapshot", lambda path: None)
+    monkeypatch.setattr(seed_ceda_delta, "load_release", lambda snapshot: incoming)
+    monkeypatch.setattr(seed_ceda_delta, "publish_factor_store", published.append)
+
+    def failing_row(*args, **kwargs):
+        raise RuntimeError("disk full")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(seed_ceda_delta, "build_factor_row", failing_row)
+        with pytest.raises(RuntimeError):
+            seed_ceda_delta.seed_ceda_delta("release.xlsx", "2")
+
+    db_session.expire_all()
+    assert [(f.external_id, f.co2e_per_unit, f.version) for f in db_session.query(EmissionFactor)] == [("OPEN-CEDA-2025-A", 1, "1")]
+    assert published == []
+
+    report = seed_ceda_delta.seed_ceda_delta("release.xlsx", "2")
+    assert (report["added"], report["changed"]) == (1, 1)
+    assert len(published) == 1
+    assert sorted((f.external_id, f.co2e_per_unit) for f in db_session.query(EmissionFactor)) == [
+        ("OPEN-CEDA-2025-A", 2), ("OPEN-CEDA-2025-B", 3)
+    ]
+
+
+def test_factor_store_lookup_matches_database(db_session, tmp_path):
+    """The memory-mapped store answers (external_id, geo_key) probes like the table."""
+    system_user = User(email="system_epa@scopeops.local", provider="system")
+    db_session.add(system_user)
+    db_session.flush()
+    factor = EmissionFactor(
+        id=uuid.uuid4(), external_id="OPEN-CEDA-2025-1111A0", provider="Open CEDA",
+        name="Oilseed farming (1111A0)", geography="United States", year=2023,
+        unit_of_measure="USD", co2e_per_unit=0.41235, scope_3_intensity=0.41235,
+        version="1", owner_id=system_user.id
+    )
+    # A user's own "Open CEDA" factor stays out of the shared store
+    private = EmissionFactor(
+        id=uuid.uuid4(), external_id="OPEN-CEDA-2025-1111A0", provider="Open CEDA",
+        name="Oilseed farming (1111A0)", geography="France", year=2023,
+        unit_of_measure="USD", co2e_per_unit=9, version="1", owner_id=uuid.uuid4()
+    )
+    db_session.add_all([factor, private])
+    db_session.commit()
+
+    store = FactorStore(build_factor_store(db_session, tmp_path / "v1"))
+    stored = store.get("OPEN-CEDA-2025-1111A0", "united states")
+
+    assert len(store) == 1
+    assert stored.id == factor.id
+    assert stored.co2e_per_unit == Decimal("0.41235")
+    assert stored.scope_1_intensity is None
+    assert store.get("OPEN-CEDA-2025-1111A0", "france") is None
+    assert store.get_first("OPEN-CEDA-2025-1111A0", ["global", "united states"]).id == factor.id
+
+
+def test_calculator_uses_factor_store_built_only_at_warm_up(db_session, tmp_path, monkeypatch):
+    """Requests read the warmed store; a new version is built off the request path while they use the table."""
+    monkeypatch.setattr(factor_store, "FACTOR_STORE_ENABLED", True)
+    monkeypatch.setattr(factor_store, "STORE_DIR", tmp_path)
+    monkeypatch.setattr(factor_store, "_store", None)
+    monkeypatch.setattr(factor_store, "_session_factory", None)
+    monkeypatch.setattr(factor_store, "_building", None)
+    user_id = uuid.uuid4()
+    system_user = User(email="system_epa@scopeops.local", provider="system")
+    db_session.add(system_user)
+    db_session.flush()
+    factor = EmissionFactor(
+        id=uuid.uuid4(), external_id="OPEN-CEDA-2025-1111A0", provider="Open CEDA",
+        name="Oilseed farming (1111A0)", geography="United States", year=2023,
+        unit_of_measure="USD", co2e_per_unit=2, version="1", owner_id=system_user.id
+    )
+    supplier = Supplier(id=uuid.uuid4(), supplier_name="Local Farm", industry_locked="Farming", region="United States", owner_id=user_id)
+
+    def spend(spend_id):
+        return SpendRecord(spend_id=spend_id, supplier_id=supplier.id, category_code="1111A0", spend_amount=100, fiscal_year=2024, owner_id=user_id)
+
+    first, second = spend(1), spend(2)
+    db_session.add_all([factor, supplier, first])
+    db_session.commit()
+
+    store = warm_factor_store(sessionmaker(bind=db_session.get_bind()))
+    assert len(store) == 1
+
+    # Without a version bump the store still answers with the old value
+    factor.co2e_per_unit = 5
+    db_session.commit()
+    assert calculate_emissions(db_session) == 1
+    assert first.calculated_co2e == 200
+
+    # A plain factor change keeps the store; only a CEDA bump (seeding) retires it
+    bump_factor_version(db_session)
+    assert get_factor_store(db_session) is store
+
+    version = bump_factor_version(db_session, ceda=True)
+    assert get_factor_store(db_session) is None
+    factor_store._building.join()
+    rebuilt = get_factor_store(db_session)
+    assert rebuilt.version == version
+    db_session.add(second)
+    db_session.commit()
+    assert calculate_emissions(db_session) == 1
+    assert second.calculated_co2e == 500
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([store.version, version])
+
+    # An unmigrated database leaves the store off instead of failing startup
+    assert warm_factor_store(sessionmaker(bind=create_engine("sqlite://"))) is None
+
+
+def test_fuzzy_industry_match_uses_latest_year_factor(db_session):
+    """The cached name index resolves an industry to the newest factor with that name."""
+    user_id = uuid.uuid4()
+
+    def factor(year):
+        return EmissionFactor(
+            id=uuid.uuid4(), name="Apparel Manufacturing", provider="Test", geography="US",
+            year=year, unit_of_measure="USD", co2e_per_unit=0.3, version="1", owner_id=user_id
+        )
+
+    old, new = factor(2022), factor(2024)
+    supplier = Supplier(id=uuid.uuid4(), supplier_name="Threads Ltd", industry_locked="apparel manufacturing", owner_id=user_id)
+    db_session.add_all([old, new, supplier])
+    db_session.commit()
+
+    matched = resolve_supplier_factor(db_session, supplier)
+
+    assert matched.id == new.id
+    assert supplier.resolved_factor_id == new.id
+
+
+def test_cycle_checks_on_deep_and_bulk_hierarchies(db_session, count_queries):
+    """The closure lookup and the in-memory bulk check agree on cycles, one statement each."""
+    user_id = uuid.uuid4()
+    chain = [Supplier(id=uuid.uuid4(), supplier_name=f"Level {i}", industry_locked="Tech", owner_id=user_id) for i in range(30)]
+    for parent, child in zip(chain, chain[1:]):
+        child.parent_id = parent.id
+    db_session.add_all(chain)
+    db_session.commit()
+
+    root, leaf = chain[0].id, chain[-1].id
+    with count_queries() as queries:
+        assert creates_cycle(db_session, child_id=root, parent_id=leaf) is True
+    assert queries.count == 1, queries
+    assert creates_cycle(db_session, child_id=leaf, parent_id=root) is False
+
+    with count_queries() as queries:
+        parent_map = load_parent_map(db_session, user_id)
+    assert queries.count == 1, queries
+    assert len(parent_map) == 30
+
+    edges = [(root, leaf), (chain[5].id, None)]
+    assert find_cycles(parent_map, edges) == []
+    assert find_cycles(parent_map, [(root, leaf)]) == [(root, leaf)]
+    assert find_cycles(parent_map, [(chain[3].id, chain[3].id)]) == [(chain[3].id, chain[3].id)]
+
+
+def test_supplier_closure_tracks_inserts_reparenting_and_deletes(db_session):
+    """Closure rows follow the ORM and match a full rebuild from parent_id."""
+    user_id = uuid.uuid4()
+    a, b, c, d = [Supplier(id=uuid.uuid4(), supplier_name=name, industry_locked="Tech", owner_id=user_id) for name in "ABCD"]
+    # Children are added before their parents to exercise out-of-order flushes
+    d.parent_id, c.parent_id, b.parent_id = c.id, b.id, a.id
+    db_session.add_all([d, c, b, a])
+    db_session.commit()
+
+    def closure():
+        return {(row.ancestor_id, row.descendant_id, row.depth) for row in db_session.query(SupplierClosure)}
+
+    assert (a.id, d.id, 3) in closure()
+    assert len(closure()) == 10
+
+    c.parent_id = a.id
+    db_session.commit()
+    assert (a.id, d.id, 2) in closure()
+    assert not any(anc == b.id and desc in (c.id, d.id) for anc, desc, _ in closure())
+
+    db_session.delete(c)
+    db_session.commit()
+    assert closure() == {(a.id, a.id, 0), (b.id, b.id, 0), (d.id, d.id, 0), (a.id, b.id, 1)}
+
+    expected = closure()
+    assert rebuild_closure(db_session, user_id) == 4
+    assert closure() == expected
+
+
+def test_password_hasher_caps_concurrency_and_times_out():
+    """Calls beyond the worker cap wait for a slot and fail fast once the queue timeout passes."""
+    hasher = PasswordHasher(workers=1, queue_timeout=0.05)
+
+    async def scenario():
+        slow = asyncio.create_task(hasher.run(time.sleep, 0.3))
+        await asyncio.sleep(0.01)
+        with pytest.raises(PasswordHasherBusy):
+            await hasher.run(time.sleep, 0)
+        await slow
+        return await hasher.run(sum, [1, 2])
+
+    assert asyncio.run(scenario()) == 3
+
+
+def test_disclosure_rows_reject_non_finite_and_date_values():
+    """Bad cells become row errors (ValueError), never a 500."""
+    row = {"company_name": "Globex", "reporting_year": 2024, "revenue_usd": "1000"}
+    assert parse_disclosure_row(row)["revenue_usd"] == Decimal("1000")
+
+    for bad in [{"revenue_usd": "NaN"}, {"scope_1_tco2e": "-inf"}, {"reporting_year": datetime(2024, 1, 1)}]:
+        with pytest.raises(ValueError):
+            parse_disclosure_row({**row, **bad})
+
+
+def test_disclosure_files_keep_source_row_numbers():
+    """Blank rows are skipped without shifting the row numbers reported in import errors."""
+    csv_content = b'company_name,revenue_usd\nGlobex,1\n\n"Initech\nLabs",2\nHooli,3\n'
+    assert [(n, row["company_name"]) for n, row in read_disclosure_file("d.csv", csv_content)] == [
+        (2, "Globex"), (4, "Initech\nLabs"), (6, "Hooli")
+    ]
+
+    wb = openpyxl.Workbook()
+    sheet = wb.active
+    sheet.append(["company_name", "revenue_usd"])
+    sheet.append(["Globex", 1])
+    sheet.append([])
+    sheet.append([None, None])
+    sheet.append(["Hooli", 3])
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    assert [(n, row["company_name"]) for n, row in read_disclosure_file("d.xlsx", buffer.getvalue())] == [
+        (2, "Globex"), (5, "Hooli")
+    ]
+
+
+def test_seed_pipeline_fails_when_a_worker_dies_silently(monkeypatch):
+    """A parser killed before posting done/error raises instead of blocking forever."""
+    monkeypatch.setattr(run_seed, "POLL_SECONDS", 0.1)
+    ctx = mp.get_context("spawn")
+    source = ctx.Queue()
+    worker = ctx.Process(target=os._exit, args=(9,), name="Metadata parser", daemon=True)
+    worker.start()
+
+    with pytest.raises(RuntimeError, match="Metadata parser exited with code 9"):
+        run_seed.next_message(source, {"categories": worker})
+
+
+def test_metrics_group_region_methods_and_forget_failed_statements():
+    """Regions never become label values, and a failing statement leaves no start time behind."""
+    priced = metrics.CALCULATOR_PRICED.labels(method="CEDA_Region_Specific")
+    before = priced._value.get()
+
+    metrics.record_calculation(Counter({"CEDA_France_Specific": 2, "CEDA_ united  STATES _Specific": 1}))
+
+    assert priced._value.get() == before + 3
+    labels = {sample.labels.get("method") for metric in metrics.registry.collect() for sample in metric.samples}
+    assert "CEDA_France_Specific" not in labels
+
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing_table"))
+        assert conn.info["metrics_query_start"] == []
+
+
+def test_async_url_keeps_only_parameters_asyncpg_accepts():
+    """libpq's sslmode becomes asyncpg's ssl; parameters asyncpg would reject are dropped."""
+    url = _default_async_url("postgresql://app:secret@db:5432/scopeops?sslmode=require&connect_timeout=10")
+
+    assert url == "postgresql+asyncpg://app:secret@db:5432/scopeops?ssl=require"
+    assert _default_async_url("sqlite:///./scopeops.db") == "sqlite+aiosqlite:///./scopeops.db"
+
+
+def test_fast_rows_only_call_back_into_python_for_decimals(monkeypatch):
+    """orjson encodes UUIDs and datetimes natively; the Python callback runs once per Decimal cell."""
+    calls = []
+    original = fast_json._default
+    monkeypatch.setattr(fast_json, "_default", lambda value: calls.append(value) or original(value))
+    rows = [(uuid.uuid4(), Decimal("1250.50"), Decimal("312.6250"), None, datetime(2024, 1, 1)) for _ in range(3)]
+
+    body = fast_json.rows_response(["id", "spend", "co2e", "scope", "at"], rows).body
+
+    assert len(calls) == 6
+    assert b'"spend":"1250.50","co2e":"312.6250"' in body
@@ -1,3 +1,16 @@
+import uuid
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+from app.models.supplier import Supplier
+from app.models.supplier_closure import SupplierClosure
+from app.services import google_oauth
+from app.models.user import User
+from app.models.category import Category
+from app.models.emission_factors import EmissionFactor
+from app.main import app
+from app.database import get_db
+from app.services.auth_cache import token_user_cache
+
 def test_auth_flow(client):
     """Test Signup and Login to get Token."""
     res = client.post("/auth/signup", json={
@@ -64,4 +77,461 @@ def test_supplier_isolation(client):
     
     res_list = client.get("/suppliers/", headers={"Authorization": f"Bearer {token_b}"})
     assert res_list.status_code == 200
-    assert len(res_list.json()) == 0
\ No newline at end of file
+    assert len(res_list.json()) == 0
+
+def test_dashboard_stats_top_and_subtree_rollup(client):
+    """Dashboard ranking is limited server-side and can roll subtrees up to parents."""
+    token = test_auth_flow(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    parent_id = client.post("/suppliers/", json={"supplier_name": "Parent Co", "industry_locked": "Tech"}, headers=headers).json()["id"]
+    child_id = client.post("/suppliers/", json={"supplier_name": "Child Co", "industry_locked": "Tech", "parent_id": parent_id}, headers=headers).json()["id"]
+    other_id = client.post("/suppliers/", json={"supplier_name": "Other Co", "industry_locked": "Tech"}, headers=headers).json()["id"]
+
+    for supplier_id, amount in [(parent_id, 100), (child_id, 500), (other_id, 300)]:
+        client.post("/spend/", json={"supplier_id": supplier_id, "category_code": "IT", "spend_amount": amount, "fiscal_year": 2024}, headers=headers)
+
+    res = client.get("/suppliers/dashboard-stats?sort=spend&top=2", headers=headers)
+    assert res.status_code == 200
+    assert [s["supplier_name"] for s in res.json()] == ["Child Co", "Other Co"]
+
+    res = client.get("/suppliers/dashboard-stats?sort=spend&top=1&rollup=subtree", headers=headers)
+    assert res.status_code == 200
+    assert res.json()[0]["supplier_name"] == "Parent Co"
+    assert res.json()[0]["total_spend"] == 600.0
+
+    res = client.get(f"/suppliers/{parent_id}/enterprise-rollup", headers=headers)
+    assert res.status_code == 200
+    assert res.json()["total_spend"] == 600.0
+
+
+def test_fast_list_matches_standard_serialization(client):
+    """The orjson row path returns the same JSON as the response_model path."""
+    token = test_auth_flow(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    supplier_id = client.post("/suppliers/", json={"supplier_name": "Acme Corp", "industry_locked": "Tech"}, headers=headers).json()["id"]
+    client.post("/spend/", json={"supplier_id": supplier_id, "category_code": "IT", "spend_amount": 1234.5, "fiscal_year": 2024}, headers=headers)
+
+    assert client.get("/spend/?fast=true", headers=headers).json() == client.get("/spend/", headers=headers).json()
+    assert client.get("/suppliers/?fast=true", headers=headers).json() == client.get("/suppliers/", headers=headers).json()
+
+
+def test_coverage_breakdown_by_method(client):
+    """Unmapped spend is grouped by method and ranked by category."""
+    token = test_auth_flow(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    supplier_id = client.post("/suppliers/", json={"supplier_name": "Acme Corp", "industry_locked": "Tech"}, headers=headers).json()["id"]
+    for code, amount in [("AAA", 100), ("BBB", 300)]:
+        client.post("/spend/", json={"supplier_id": supplier_id, "category_code": code, "spend_amount": amount, "fiscal_year": 2024}, headers=headers)
+    client.post("/spend/calculate", headers=headers)
+
+    res = client.get("/spend/coverage/breakdown", headers=headers)
+    assert res.status_code == 200
+    data = res.json()
+    assert data["by_method"][0]["calculation_method"] == "Requires_Mapping"
+    assert data["by_method"][0]["record_count"] == 2
+    assert [c["category_code"] for c in data["top_unmapped_categories"]] == ["BBB", "AAA"]
+
+
+def test_async_read_endpoints_see_committed_data(client, db_session):
+    """Summary, coverage and categories are served by the async session."""
+    token = test_auth_flow(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    db_session.add(Category(category_id="334111", category_name="Electronic computer manufacturing"))
+    db_session.commit()
+
+    supplier_id = client.post("/suppliers/", json={"supplier_name": "Acme Corp", "industry_locked": "Tech"}, headers=headers).json()["id"]
+    for amount in [100, 300]:
+        client.post("/spend/", json={"supplier_id": supplier_id, "category_code": "AAA", "spend_amount": amount, "fiscal_year": 2024}, headers=headers)
+
+    summary = client.get("/spend/summary", headers=headers).json()
+    assert summary["record_count"] == 2
+    assert summary["total_spend"] == 400.0
+    assert summary["coverage_percentage"] == 0
+
+    coverage = client.get("/spend/coverage", headers=headers).json()
+    assert coverage == {"total_spend": 400.0, "covered_spend": 0.0, "coverage_percentage": 0}
+
+    categories = client.get("/spend/categories", headers=headers).json()
+    assert categories == [{"id": "334111", "name": "Electronic computer manufacturing"}]
+
+    # Authentication included, they never check out a sync connection
+    def no_sync_session():
+        raise AssertionError("async endpoint opened a sync session")
+        yield
+
+    token_user_cache.clear()
+    sync_override = app.dependency_overrides[get_db]
+    app.dependency_overrides[get_db] = no_sync_session
+    try:
+        for path in ["/spend/summary", "/spend/coverage", "/spend/categories", "/suppliers/dashboard-stats"]:
+            assert client.get(path, headers=headers).status_code == 200, path
+    finally:
+        app.dependency_overrides[get_db] = sync_override
+
+def test_emission_factor_search_ranks_prefix_matches(client):
+    """Search returns filtered, prefix-ranked matches instead of the whole table."""
+    token = test_auth_flow(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for name, ext_id, geography in [
+        ("Steel products", "OPEN-CEDA-2025-331110", "United States"),
+        ("Steel", "OPEN-CEDA-2025-331111", "United States"),
+        ("Stainless steel", "OPEN-CEDA-2025-331112", "United States"),
+        ("Steel products", "OPEN-CEDA-2025-331110", "France"),
+    ]:
+        client.post("/emission-factors/", json={
+            "provider": "Open CEDA", "name": name, "geography": geography, "year": 2023,
+            "co2e_per_unit": 0.5, "version": "1", "external_id": ext_id
+        }, headers=headers)
+
+    res = client.get("/emission-factors/search?q=steel&geography=united states", headers=headers)
+    assert res.status_code == 200
+    assert [f["name"] for f in res.json()] == ["Steel", "Steel products"]
+
+    res = client.get("/emission-factors/search?q=open-ceda-2025-331112", headers=headers)
+    assert [f["name"] for f in res.json()] == ["Stainless steel"]
+
+
+def test_emission_factor_search_includes_system_catalogue(client, db_session):
+    """Factors seeded under the system user are searchable by everyone; other users' are not."""
+    token = test_auth_flow(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    system_user = User(email="system_epa@scopeops.local", provider="system")
+    other_user = User(email="other@example.com", provider="local")
+    db_session.add_all([system_user, other_user])
+    db_session.flush()
+    for name, owner_id in [("Copper wire", system_user.id), ("Copper pipe", other_user.id)]:
+        db_session.add(EmissionFactor(
+            provider="Open CEDA", name=name, geography="Global", year=2023,
+            unit_of_measure="USD", co2e_per_unit=0.5, version="1", owner_id=owner_id
+        ))
+    db_session.commit()
+
+    res = client.get("/emission-factors/search?q=copper", headers=headers)
+    assert res.status_code == 200
+    assert [f["name"] for f in res.json()] == ["Copper wire"]
+
+
+def test_bulk_resolve_supplier_factors(client, db_session):
+    """Unresolved suppliers are matched in chunks against disclosures and the industry index."""
+    token = test_auth_flow(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    client.post("/emission-factors/", json={
+        "provider": "Open CEDA", "name": "Computer systems design services", "geography": "United States",
+        "year": 2023, "co2e_per_unit": 0.2, "version": "1"
+    }, headers=headers)
+    for name, domain, industry in [
+        ("Nike", "nike.com", "Apparel"),
+        ("Nike Europe", "nike.com", "Apparel"),
+        ("Acme IT", None, "Computer systems design services"),
+        ("Unknown Co", None, "Underwater basket weaving"),
+    ]:
+        client.post("/suppliers/", json={"supplier_name": name, "domain": domain, "industry_locked": industry}, headers=headers)
+
+    res = client.post("/suppliers/resolve-factors?chunk_size=3", headers=headers)
+    assert res.status_code == 200
+    assert res.json() == {"processed": 4, "verified": 2, "fuzzy": 1, "unresolved": 1, "factors_created": 1}
+
+    resolved = dict(db_session.query(Supplier.supplier_name, Supplier.resolved_factor_id).all())
+    assert resolved["Nike"] == resolved["Nike Europe"] is not None
+    assert resolved["Acme IT"] is not None
+    assert resolved["Unknown Co"] is None
+
+    res = client.post("/suppliers/resolve-factors", headers=headers)
+    assert res.json()["processed"] == 1
+
+
+def test_disclosure_registry_import_and_resolution(client, db_session):
+    """Imported disclosures get precomputed intensities and drive supplier resolution."""
+    token = test_auth_flow(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    csv_content = (
+        "company_name,domain,reporting_year,revenue_usd,scope_1_tco2e,scope_2_market_tco2e,scope_3_total_tco2e\n"
+        "Globex Corporation,globex.com,2023,1000000,100,50,850\n"
+        "Globex Corporation,globex.com,2024,2000000,100,100,800\n"
+        "Initech,,2024,not-a-number,1,1,1\n"
+        "Hooli,,2024,nan,1,1,1\n"
+        "Vandelay Industries,,2024,1000,inf,1,1\n"
+    )
+    upload = {"file": ("disclosures.csv", csv_content, "text/csv")}
+
+    assert client.post("/disclosures/import", files=upload, headers=headers).status_code == 403
+    db_session.query(User).update({User.is_admin: True})
+    db_session.commit()
+
+    res = client.post("/disclosures/import", files=upload, headers=headers)
+    assert res.status_code == 200
+    assert res.json()["inserted"] == 2
+    assert res.json()["error_count"] == 3
+
+    res = client.get("/disclosures/lookup?domain=https://www.GLOBEX.com/about", headers=headers)
+    assert res.status_code == 200
+    assert res.json()["reporting_year"] == 2024
+    assert res.json()["co2e_intensity"] == 0.0005
+
+    client.post("/suppliers/", json={"supplier_name": "globex  corporation", "industry_locked": "Tech"}, headers=headers)
+    assert client.post("/suppliers/resolve-factors", headers=headers).json()["verified"] == 1
+    assert str(db_session.query(Supplier.resolved_factor_id).scalar()) == res.json()["emission_factor_id"]
+
+
+def test_hierarchy_import_applies_edges_in_bulk(client):
+    """Edges by id or name are validated together and applied in one pass."""
+    token = test_auth_flow(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    ids = {
+        name: client.post("/suppliers/", json={"supplier_name": name, "industry_locked": "Tech"}, headers=headers).json()["id"]
+        for name in ["Holding", "Subsidiary", "Plant"]
+    }
+    client.post("/spend/", json={"supplier_id": ids["Plant"], "category_code": "IT", "spend_amount": 250, "fiscal_year": 2024}, headers=headers)
+
+    res = client.post("/suppliers/hierarchy/import", json={"edges": [
+        {"child_name": "subsidiary", "parent_id": ids["Holding"]},
+        {"child_id": ids["Plant"], "parent_name": "Subsidiary"},
+    ]}, headers=headers)
+    assert res.status_code == 200
+    assert res.json()["updated"] == 2
+    assert client.get(f"/suppliers/{ids['Holding']}/enterprise-rollup", headers=headers).json()["total_spend"] == 250.0
+
+    # One invalid edge rejects the whole batch, including its valid edges
+    res = client.post("/suppliers/hierarchy/import", json={"edges": [
+        {"child_id": ids["Plant"], "parent_id": None},
+        {"child_id": ids["Holding"], "parent_name": "Plant"},
+        {"child_name": "Subsidiary", "parent_name": "Holding"},
+        {"child_name": "Nobody", "parent_name": "Holding"},
+    ]}, headers=headers)
+    assert res.status_code == 400
+    assert res.json()["detail"]["error_count"] == 1
+    assert "not found" in res.json()["detail"]["errors"][0]
+
+    res = client.post("/suppliers/hierarchy/import", json={"edges": [
+        {"child_id": ids["Holding"], "parent_name": "Plant"},
+    ]}, headers=headers)
+    assert res.status_code == 400
+    assert "circular" in res.json()["detail"]["errors"][0]
+    assert client.get(f"/suppliers/{ids['Holding']}/enterprise-rollup", headers=headers).json()["total_spend"] == 250.0
+
+
+def test_enterprise_rollup_breaks_down_by_depth_and_child(client):
+    """One rollup call returns per-depth and per-direct-child subtotals."""
+    token = test_auth_flow(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def supplier(name, parent=None):
+        return client.post("/suppliers/", json={"supplier_name": name, "industry_locked": "Tech", "parent_id": parent}, headers=headers).json()["id"]
+
+    group = supplier("Group")
+    europe = supplier("Europe", group)
+    plant = supplier("Plant", europe)
+    asia = supplier("Asia", group)
+    for supplier_id, amount in [(group, 10), (europe, 20), (plant, 300), (asia, 40)]:
+        client.post("/spend/", json={"supplier_id": supplier_id, "category_code": "IT", "spend_amount": amount, "fiscal_year": 2024}, headers=headers)
+
+    data = client.get(f"/suppliers/{group}/enterprise-rollup", headers=headers).json()
+    assert data["total_spend"] == 370.0
+    assert data["supplier_count"] == 4
+    assert [(d["depth"], d["spend"], d["supplier_count"]) for d in data["by_depth"]] == [(0, 10.0, 1), (1, 60.0, 2), (2, 300.0, 1)]
+    assert {c["supplier_name"]: c["spend"] for c in data["children"]} == {"Europe": 320.0, "Asia": 40.0}
+
+    data = client.get(f"/suppliers/{group}/enterprise-rollup?max_depth=1", headers=headers).json()
+    assert data["total_spend"] == 70.0
+    assert {c["supplier_name"]: c["spend"] for c in data["children"]} == {"Europe": 20.0, "Asia": 40.0}
+
+
+def test_bulk_update_and_delete_suppliers(client, db_session):
+    """Bulk endpoints report per-id results and keep the hierarchy consistent."""
+    token = test_auth_flow(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    ids = {
+        name: client.post("/suppliers/", json={"supplier_name": name, "industry_locked": "Unknown"}, headers=headers).json()["id"]
+        for name in ["Group", "Division", "Plant"]
+    }
+    missing = str(uuid.uuid4())
+
+    res = client.patch("/suppliers/bulk", json={"updates": [
+        {"id": ids["Division"], "parent_id": ids["Group"], "industry_locked": "Steel"},
+        {"id": ids["Plant"], "parent_id": ids["Division"], "region": "France"},
+        {"id": ids["Group"], "parent_id": ids["Group"]},
+        {"id": missing, "region": "France"},
+    ]}, headers=headers)
+    assert res.status_code == 200
+    assert [r["status"] for r in res.json()["results"]] == ["updated", "updated", "error", "not_found"]
+
+    res = client.patch("/suppliers/bulk", json={"updates": [{"id": ids["Group"], "parent_id": ids["Plant"]}]}, headers=headers)
+    assert "Circular" in res.json()["results"][0]["detail"]
+
+    suppliers = {s["supplier_name"]: s for s in client.get("/suppliers/", headers=headers).json()}
+    assert suppliers["Division"]["industry_locked"] == "Steel"
+    assert suppliers["Plant"]["region"] == "France"
+    assert suppliers["Plant"]["parent_id"] == ids["Division"]
+
+    res = client.request("DELETE", "/suppliers/bulk", json={"ids": [ids["Division"], missing]}, headers=headers)
+    assert [r["status"] for r in res.json()["results"]] == ["deleted", "not_found"]
+
+    suppliers = {s["supplier_name"]: s for s in client.get("/suppliers/", headers=headers).json()}
+    assert set(suppliers) == {"Group", "Plant"}
+    assert suppliers["Plant"]["parent_id"] is None
+    assert db_session.query(SupplierClosure).count() == 2
+
+
+def test_supplier_tree_nests_children_with_depth_limit(client):
+    """The tree endpoint nests the whole forest or one subtree, optionally cut at a depth."""
+    token = test_auth_flow(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def supplier(name, parent=None):
+        return client.post("/suppliers/", json={"supplier_name": name, "industry_locked": "Tech", "parent_id": parent}, headers=headers).json()["id"]
+
+    group = supplier("Group")
+    europe = supplier("Europe", group)
+    supplier("Plant", europe)
+    supplier("Asia", group)
+    supplier("Standalone")
+
+    tree = client.get("/suppliers/tree", headers=headers).json()
+    assert [n["supplier_name"] for n in tree] == ["Group", "Standalone"]
+    assert [c["supplier_name"] for c in tree[0]["children"]] == ["Asia", "Europe"]
+    assert tree[0]["children"][1]["children"][0]["supplier_name"] == "Plant"
+
+    tree = client.get("/suppliers/tree?max_depth=1", headers=headers).json()
+    assert tree[0]["children"][1]["children"] == []
+
+    tree = client.get(f"/suppliers/tree?root_id={europe}", headers=headers).json()
+    assert len(tree) == 1
+    assert [c["supplier_name"] for c in tree[0]["children"]] == ["Plant"]
+
+    assert client.get(f"/suppliers/tree?root_id={uuid.uuid4()}", headers=headers).status_code == 404
+
+
+def test_token_user_cache_hits_and_invalidation(client, db_session):
+    """Repeat requests reuse the cached user; admin and activation changes evict it."""
+    token = test_auth_flow(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for _ in range(3):
+        assert client.get("/auth/me", headers=headers).status_code == 200
+    assert client.get("/auth/cache-stats", headers=headers).status_code == 403
+
+    user = db_session.query(User).filter(User.email == "test@example.com").one()
+    user.is_admin = True
+    db_session.commit()
+
+    stats = client.get("/auth/cache-stats", headers=headers).json()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 2
+
+    # Each request closes the shared session, so reload before changing the user again
+    db_session.query(User).filter(User.email == "test@example.com").one().is_active = False
+    db_session.commit()
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+
+def test_deactivated_user_tokens_are_rejected(client, db_session):
+    """A user with is_active=False gets 401 from sync and async endpoints until reactivated."""
+    token = test_auth_flow(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    db_session.query(User).filter(User.email == "test@example.com").update({User.is_active: False})
+    db_session.commit()
+    token_user_cache.clear()
+
+    assert client.get("/auth/me", headers=headers).status_code == 401
+    assert client.get("/spend/summary", headers=headers).status_code == 401
+
+    db_session.query(User).filter(User.email == "test@example.com").update({User.is_active: True})
+    db_session.commit()
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    assert client.get("/spend/summary", headers=headers).status_code == 200
+
+
+def test_google_login_uses_shared_client_and_caches_userinfo(client):
+    """Google flows go through the shared async client; repeat userinfo lookups are cached."""
+    calls = []
+
+    def handler(request: httpx.Request):
+        calls.append(request.url.path)
+        if request.url.path.endswith("/token"):
+            return httpx.Response(200, json={"access_token": "google-access"})
+        if request.headers["Authorization"] == "Bearer bad-token":
+            return httpx.Response(401, json={"error": "invalid_token"})
+        return httpx.Response(200, json={"email": "oauth@example.com", "name": "OAuth User"})
+
+    google_oauth.set_http_client(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    try:
+        for _ in range(2):
+            res = client.post("/auth/google/", json={"token": "react-token"})
+            assert res.status_code == 200
+        assert calls.count("/oauth2/v1/userinfo") == 1
+
+        assert client.post("/auth/google/", json={"token": "bad-token"}).status_code == 400
+
+        res = client.get("/auth/google/callback?code=abc")
+        assert res.status_code == 200
+        me = client.get("/auth/me", headers={"Authorization": f"Bearer {res.json()['access_token']}"}).json()
+        assert me["provider"] == "google"
+    finally:
+        google_oauth.set_http_client(None)
+
+def _scrape(client):
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(res.text)
+        for sample in family.samples
+    }
+
+def test_metrics_expose_route_sql_and_calculator_counters(client):
+    """Routes are labelled by template and carry their SQL statement counts."""
+    token = test_auth_flow(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    before = _scrape(client)
+
+    supplier_id = client.post("/suppliers/", json={"supplier_name": "Acme Corp", "industry_locked": "Tech"}, headers=headers).json()["id"]
+    client.post("/spend/", json={"supplier_id": supplier_id, "category_code": "AAA", "spend_amount": 100, "fiscal_year": 2024}, headers=headers)
+    client.get(f"/suppliers/{supplier_id}/enterprise-rollup", headers=headers)
+    client.post("/spend/calculate", headers=headers)
+    after = _scrape(client)
+
+    def delta(name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        return after.get(key, 0) - before.get(key, 0)
+
+    route = {"method": "GET", "route": "/suppliers/{supplier_id}/enterprise-rollup"}
+    assert delta("scopeops_http_requests_total", status="200", **route) == 1
+    assert delta("scopeops_http_request_duration_seconds_count", **route) == 1
+    assert delta("scopeops_http_request_sql_statements_sum", **route) >= 1
+    assert delta("scopeops_calculator_runs_total") == 1
+    assert delta("scopeops_calculator_requires_mapping_total") == 1
+    assert ("scopeops_auth_cache_hit_rate", ()) in after
+
+def test_bulk_upload_of_1000_rows_stays_within_statement_budget(client, db_session, count_queries):
+    """Supplier resolution, inserts and pricing are batched, not issued per row."""
+    token = test_auth_flow(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post("/suppliers/", json={"supplier_name": "Acme Corporation", "industry_locked": "Tech"}, headers=headers)
+
+    names = ["Acme Corporation", "Northwind Traders", "Globex", "Initech", "Umbrella Pharma",
+             "Stark Industries", "Wayne Logistics", "Hooli", "Vandelay Imports", "Cyberdyne Systems"]
+    lines = ["supplier_name,category_code,fiscal_year,spend_amount,currency"]
+    for i in range(1000):
+        name = names[i % len(names)]
+        lines.append(f"{name},CAT{i % 25},2024,{100 + i},USD")
+    csv_file = ("spend.csv", "\n".join(lines).encode(), "text/csv")
+
+    with count_queries() as queries:
+        res = client.post("/spend/bulk-upload", files={"file": csv_file}, headers=headers)
+
+    assert res.status_code == 200
+    assert res.json()["inserted_count"] == 1000
+    assert queries.count <= 20, queries
+
+    assert db_session.query(Supplier).count() == 10
+    assert client.get("/spend/summary", headers=headers).json()["record_count"] == 1000
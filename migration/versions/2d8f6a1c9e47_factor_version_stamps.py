@@ -0,0 +1,34 @@
+"""factor version stamps
+
+Revision ID: 2d8f6a1c9e47
+Revises: a9c4e7d2b613
+Create Date: 2026-10-20 09:12:40.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d8f6a1c9e47'
+down_revision: Union[str, Sequence[str], None] = 'a9c4e7d2b613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'factor_versions',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('version', sa.String(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('factor_versions')
@@ -0,0 +1,28 @@
+"""spend owner supplier index
+
+Revision ID: 3f1a9c2d7b40
+Revises: c62362f588bf
+Create Date: 2026-10-19 09:12:04.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1a9c2d7b40'
+down_revision: Union[str, Sequence[str], None] = 'c62362f588bf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_spend_records_owner_supplier', 'spend_records', ['owner_id', 'supplier_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_spend_records_owner_supplier', table_name='spend_records')
@@ -0,0 +1,46 @@
+"""emission factor geo key
+
+Revision ID: 5c7d93e1f2a8
+Revises: 8b2e41d6a9c3
+Create Date: 2026-10-19 11:26:15.090317
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c7d93e1f2a8'
+down_revision: Union[str, Sequence[str], None] = '8b2e41d6a9c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _geo_key(value):
+    # Mirrors app.services.geography.normalize_geography at the time of this revision
+    key = re.sub(r"\s+", " ", value or "").strip().lower()
+    return key or None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('emission_factors', sa.Column('geo_key', sa.String(), nullable=True))
+
+    factors = sa.table('emission_factors', sa.column('geography', sa.String), sa.column('geo_key', sa.String))
+    conn = op.get_bind()
+    geographies = [row[0] for row in conn.execute(sa.select(factors.c.geography).distinct())]
+    for geography in geographies:
+        conn.execute(
+            factors.update().where(factors.c.geography == geography).values(geo_key=_geo_key(geography))
+        )
+
+    op.create_index('ix_emission_factors_provider_ext_geo', 'emission_factors', ['provider', 'external_id', 'geo_key'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_emission_factors_provider_ext_geo', table_name='emission_factors')
+    op.drop_column('emission_factors', 'geo_key')
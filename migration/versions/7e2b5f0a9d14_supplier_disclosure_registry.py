@@ -0,0 +1,57 @@
+"""supplier disclosure registry
+
+Revision ID: 7e2b5f0a9d14
+Revises: d41f06b8c5e2
+Create Date: 2026-10-19 19:02:44.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2b5f0a9d14'
+down_revision: Union[str, Sequence[str], None] = 'd41f06b8c5e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Batch mode so the nullability change and foreign key also apply on SQLite
+    with op.batch_alter_table('supplier_disclosures') as batch_op:
+        batch_op.alter_column('supplier_id', existing_type=sa.UUID(), nullable=True)
+        batch_op.add_column(sa.Column('company_name', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('domain', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('domain_key', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('name_key', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('co2e_intensity', sa.Numeric(), nullable=True))
+        batch_op.add_column(sa.Column('scope_1_intensity', sa.Numeric(), nullable=True))
+        batch_op.add_column(sa.Column('scope_2_intensity', sa.Numeric(), nullable=True))
+        batch_op.add_column(sa.Column('scope_3_intensity', sa.Numeric(), nullable=True))
+        batch_op.add_column(sa.Column('emission_factor_id', sa.UUID(), nullable=True))
+        batch_op.create_foreign_key(
+            'supplier_disclosures_emission_factor_id_fkey', 'emission_factors', ['emission_factor_id'], ['id']
+        )
+        batch_op.create_index(batch_op.f('ix_supplier_disclosures_domain_key'), ['domain_key'], unique=False)
+        batch_op.create_index(batch_op.f('ix_supplier_disclosures_name_key'), ['name_key'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('supplier_disclosures') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_supplier_disclosures_name_key'))
+        batch_op.drop_index(batch_op.f('ix_supplier_disclosures_domain_key'))
+        batch_op.drop_constraint('supplier_disclosures_emission_factor_id_fkey', type_='foreignkey')
+        batch_op.drop_column('emission_factor_id')
+        batch_op.drop_column('scope_3_intensity')
+        batch_op.drop_column('scope_2_intensity')
+        batch_op.drop_column('scope_1_intensity')
+        batch_op.drop_column('co2e_intensity')
+        batch_op.drop_column('name_key')
+        batch_op.drop_column('domain_key')
+        batch_op.drop_column('domain')
+        batch_op.drop_column('company_name')
+        batch_op.alter_column('supplier_id', existing_type=sa.UUID(), nullable=False)
@@ -0,0 +1,38 @@
+"""spend coverage partial indexes
+
+Revision ID: 8b2e41d6a9c3
+Revises: 3f1a9c2d7b40
+Create Date: 2026-10-19 10:03:41.772019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e41d6a9c3'
+down_revision: Union[str, Sequence[str], None] = '3f1a9c2d7b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_spend_records_requires_mapping', 'spend_records', ['owner_id', 'category_code'], unique=False,
+        postgresql_where=sa.text("calculation_method = 'Requires_Mapping'"),
+        sqlite_where=sa.text("calculation_method = 'Requires_Mapping'")
+    )
+    op.create_index(
+        'ix_spend_records_uncalculated', 'spend_records', ['owner_id'], unique=False,
+        postgresql_where=sa.text("calculated_co2e IS NULL"),
+        sqlite_where=sa.text("calculated_co2e IS NULL")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_spend_records_uncalculated', table_name='spend_records')
+    op.drop_index('ix_spend_records_requires_mapping', table_name='spend_records')
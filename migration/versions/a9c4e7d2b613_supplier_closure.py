@@ -0,0 +1,57 @@
+"""supplier closure
+
+Revision ID: a9c4e7d2b613
+Revises: 7e2b5f0a9d14
+Create Date: 2026-10-19 19:48:12.730551
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9c4e7d2b613'
+down_revision: Union[str, Sequence[str], None] = '7e2b5f0a9d14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _closure_rows(parent_map):
+    # Mirrors app.services.supplier_closure.iter_closure_rows at the time of this revision
+    for node in parent_map:
+        current, depth, seen = node, 0, set()
+        while current is not None and current not in seen:
+            seen.add(current)
+            yield {"ancestor_id": current, "descendant_id": node, "depth": depth}
+            current = parent_map.get(current)
+            depth += 1
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    closure = op.create_table('supplier_closure',
+    sa.Column('ancestor_id', sa.UUID(), nullable=False),
+    sa.Column('descendant_id', sa.UUID(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['suppliers.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['descendant_id'], ['suppliers.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    op.create_index('ix_supplier_closure_descendant_depth', 'supplier_closure', ['descendant_id', 'depth'], unique=False)
+    op.create_index(op.f('ix_suppliers_parent_id'), 'suppliers', ['parent_id'], unique=False)
+
+    suppliers = sa.table('suppliers', sa.column('id', sa.UUID), sa.column('parent_id', sa.UUID))
+    conn = op.get_bind()
+    parent_map = dict(conn.execute(sa.select(suppliers.c.id, suppliers.c.parent_id)).all())
+    rows = list(_closure_rows(parent_map))
+    for i in range(0, len(rows), 5000):
+        op.bulk_insert(closure, rows[i:i + 5000])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_suppliers_parent_id'), table_name='suppliers')
+    op.drop_index('ix_supplier_closure_descendant_depth', table_name='supplier_closure')
+    op.drop_table('supplier_closure')
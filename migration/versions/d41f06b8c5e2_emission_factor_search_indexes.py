@@ -0,0 +1,49 @@
+"""emission factor search indexes
+
+Revision ID: d41f06b8c5e2
+Revises: 5c7d93e1f2a8
+Create Date: 2026-10-19 12:48:30.661842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41f06b8c5e2'
+down_revision: Union[str, Sequence[str], None] = '5c7d93e1f2a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index(
+            'ix_emission_factors_name_trgm', 'emission_factors', ['name'], unique=False,
+            postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}
+        )
+        op.create_index(
+            'ix_emission_factors_external_id_trgm', 'emission_factors', ['external_id'], unique=False,
+            postgresql_using='gin', postgresql_ops={'external_id': 'gin_trgm_ops'}
+        )
+    elif dialect == "sqlite":
+        op.create_index('ix_emission_factors_name_prefix', 'emission_factors', [sa.text('lower(name)')], unique=False)
+        op.create_index('ix_emission_factors_external_id_prefix', 'emission_factors', [sa.text('lower(external_id)')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        op.drop_index('ix_emission_factors_external_id_trgm', table_name='emission_factors')
+        op.drop_index('ix_emission_factors_name_trgm', table_name='emission_factors')
+    elif dialect == "sqlite":
+        op.drop_index('ix_emission_factors_external_id_prefix', table_name='emission_factors')
+        op.drop_index('ix_emission_factors_name_prefix', table_name='emission_factors')
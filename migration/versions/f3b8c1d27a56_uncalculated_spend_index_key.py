@@ -0,0 +1,38 @@
+"""uncalculated spend index key
+
+Revision ID: f3b8c1d27a56
+Revises: 2d8f6a1c9e47
+Create Date: 2026-10-21 11:26:05.514370
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8c1d27a56'
+down_revision: Union[str, Sequence[str], None] = '2d8f6a1c9e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_spend_records_uncalculated', table_name='spend_records')
+    op.create_index(
+        'ix_spend_records_uncalculated', 'spend_records', ['spend_id'], unique=False,
+        postgresql_where=sa.text("calculated_co2e IS NULL"),
+        sqlite_where=sa.text("calculated_co2e IS NULL")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_spend_records_uncalculated', table_name='spend_records')
+    op.create_index(
+        'ix_spend_records_uncalculated', 'spend_records', ['owner_id'], unique=False,
+        postgresql_where=sa.text("calculated_co2e IS NULL"),
+        sqlite_where=sa.text("calculated_co2e IS NULL")
+    )